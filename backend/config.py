@@ -1,18 +1,23 @@
+import functools
 import os
-from typing import Iterable, List
+from dataclasses import dataclass
+from typing import Tuple
 
 
+# Environment is read once per process; both helpers are cached (defaults must be hashable).
+@functools.lru_cache(maxsize=None)
 def env_bool(name: str, default: bool) -> bool:
     v = os.getenv(name)
     if v is None:
         return default
     return v.strip().lower() in {"1", "true", "yes", "y", "on"}
 
-def env_list(name: str, default: Iterable[str] | None = None) -> List[str]:
+@functools.lru_cache(maxsize=None)
+def env_list(name: str, default: Tuple[str, ...] = ()) -> Tuple[str, ...]:
     value = os.getenv(name, "")
     if not value:
-        return list(default or [])
-    return [item.strip() for item in value.split(",") if item.strip()]
+        return tuple(default)
+    return tuple(item.strip() for item in value.split(",") if item.strip())
 
 
 TRUTHSIG_ENV = os.getenv("TRUTHSIG_ENV", "development")
@@ -28,25 +33,58 @@ STRIPE_SECRET_KEY = os.getenv("STRIPE_SECRET_KEY", "")
 
 CORS_ORIGINS = env_list(
     "CORS_ORIGINS",
-    default=[
+    default=(
         "https://truthsig-web.onrender.com",
         "http://localhost:3000",
         "http://127.0.0.1:3000",
-    ],
+    ),
 )
-TRUSTED_HOSTS = env_list("TRUSTED_HOSTS", default=["*"])
+TRUSTED_HOSTS = env_list("TRUSTED_HOSTS", default=("*",))
+
+
+@dataclass(frozen=True)
+class Settings:
+    truthsig_env: str
+    jwt_secret: str
+    jwt_alg: str
+    jwt_expire_hours: int
+    admin_api_key: str
+    paywall_enabled: bool
+    price_usd: int
+    max_mb: int
+    stripe_secret_key: str
+    cors_origins: Tuple[str, ...]
+    trusted_hosts: Tuple[str, ...]
+
+
+@functools.lru_cache(maxsize=None)
+def get_config() -> Settings:
+    return Settings(
+        truthsig_env=TRUTHSIG_ENV,
+        jwt_secret=JWT_SECRET,
+        jwt_alg=JWT_ALG,
+        jwt_expire_hours=JWT_EXPIRE_HOURS,
+        admin_api_key=ADMIN_API_KEY,
+        paywall_enabled=PAYWALL_ENABLED,
+        price_usd=PRICE_USD,
+        max_mb=MAX_MB,
+        stripe_secret_key=STRIPE_SECRET_KEY,
+        cors_origins=CORS_ORIGINS,
+        trusted_hosts=TRUSTED_HOSTS,
+    )
 
 
 def validate_production_settings() -> None:
-    if TRUTHSIG_ENV.lower() != "production":
+    cfg = get_config()
+    if cfg.truthsig_env.lower() != "production":
         return
 
     errors = []
-    if not ADMIN_API_KEY:
+    if not cfg.admin_api_key:
         errors.append("TRUTHSIG_ADMIN_API_KEY is required in production.")
-    if JWT_SECRET == "dev-secret-change-me":
+    if cfg.jwt_secret == "dev-secret-change-me":
         errors.append("JWT_SECRET must be set in production.")
-    if not CORS_ORIGINS or "*" in CORS_ORIGINS:
+    if not cfg.cors_origins or "*" in cfg.cors_origins:
         errors.append("CORS_ORIGINS must be explicit in production.")
     if errors:
         raise RuntimeError(" ".join(errors))
\ No newline at end of file
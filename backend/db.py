@@ -41,10 +41,16 @@ async def create_pool() -> asyncpg.Pool:
             schema="pg_catalog",
         )
 
+    # Keep DB_POOL_MAX x (uvicorn workers x instances) below Postgres max_connections.
+    min_size = int(os.getenv("DB_POOL_MIN", "2"))
+    max_size = max(min_size, int(os.getenv("DB_POOL_MAX", "20")))
+
     return await asyncpg.create_pool(
         dsn,
-        min_size=1,
-        max_size=5,
+        min_size=min_size,
+        max_size=max_size,
+        max_inactive_connection_lifetime=300,
+        command_timeout=30,
         init=_init_connection,
     )
 
@@ -651,6 +657,14 @@ async def list_evidence_events(pool: asyncpg.Pool, evidence_id: str, limit: int
     return [dict(r) for r in rows]
 
 
+_INSERT_EVENT_SQL = """
+    INSERT INTO events (
+        case_id, evidence_id, event_type, actor, ip, user_agent, details_json
+    )
+    VALUES ($1,$2,$3,$4,$5,$6,$7::jsonb)
+"""
+
+
 async def insert_event(
     pool: asyncpg.Pool,
     *,
@@ -664,12 +678,7 @@ async def insert_event(
 ) -> None:
     async with pool.acquire() as con:
         await con.execute(
-            """
-            INSERT INTO events (
-                case_id, evidence_id, event_type, actor, ip, user_agent, details_json
-            )
-            VALUES ($1,$2,$3,$4,$5,$6,$7::jsonb)
-            """,
+            _INSERT_EVENT_SQL,
             case_id,
             evidence_id,
             event_type,
@@ -680,6 +689,24 @@ async def insert_event(
         )
 
 
+async def insert_events(pool: asyncpg.Pool, events: List[Dict[str, Any]]) -> None:
+    """Inserts many events in one round trip; each dict takes insert_event's keyword arguments."""
+    rows = [
+        (
+            e.get("case_id"),
+            e.get("evidence_id"),
+            e["event_type"],
+            e.get("actor"),
+            e.get("ip"),
+            e.get("user_agent"),
+            json.dumps(e.get("details") or {}),
+        )
+        for e in events
+    ]
+    async with pool.acquire() as con:
+        await con.executemany(_INSERT_EVENT_SQL, rows)
+
+
 async def create_evidence_public_link(
     pool: asyncpg.Pool,
     *,
@@ -1,6 +1,13 @@
+import atexit
+import functools
 import json
 import os
-from typing import Any, Dict, Tuple
+import re
+import secrets
+import select
+import subprocess
+import threading
+from typing import Any, Dict, Optional, Tuple
 
 from .utils import run_cmd, which
 
@@ -53,7 +60,14 @@ def metadata_consistency(meta: Dict[str, Any]) -> Dict[str, Any]:
     elif c["checks"]:
         c["status"] = "CONSISTENT"
     return c
+# Installed tools don't change within a process (see utils.which); upgrades ship with a
+# restart. Callers get fresh dicts so the cached copy can't be mutated through a result.
 def tool_versions() -> Dict[str, Dict[str, Any]]:
+    return {t: dict(info) for t, info in _tool_versions().items()}
+
+
+@functools.lru_cache(maxsize=1)
+def _tool_versions() -> Dict[str, Dict[str, Any]]:
     tools = {}
     for t, cmd in {
         "exiftool": ["exiftool", "-ver"],
@@ -86,22 +100,154 @@ def detect_media_type(path: str) -> str:
                 pass
     return "unknown"
 
+EXIFTOOL_ARGS = ["-json", "-G", "-a", "-s", "-fast"]
+EXIFTOOL_TIMEOUT_S = 25
+
+
+class _ExifToolDaemon:
+    """
+    One long-lived `exiftool -stay_open` process, so Perl startup is paid once per
+    worker rather than per file. Requests are serialised on a lock; callers that find
+    it busy (or a path the argfile protocol can't carry) use a one-shot process instead.
+    Each request ends with `-executeNNN` for a fresh random NNN, so file metadata can't
+    forge the `{readyNNN}` end marker; any response that doesn't line up exactly with
+    its marker ends the process rather than leaving stale output in the pipe.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._proc: Optional[subprocess.Popen] = None
+
+    def _after_fork(self) -> None:
+        # a forked worker must not share the parent's pipes
+        self._lock = threading.Lock()
+        self._proc = None
+
+    def _start(self) -> subprocess.Popen:
+        if self._proc is None or self._proc.poll() is not None:
+            self._proc = subprocess.Popen(
+                ["exiftool", "-stay_open", "True", "-@", "-", "-common_args", *EXIFTOOL_ARGS],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+        return self._proc
+
+    def _read_until(self, proc: subprocess.Popen, sentinel: bytes, timeout: float) -> bytes:
+        fd = proc.stdout.fileno()
+        buf = bytearray()
+        while True:
+            ready, _, _ = select.select([fd], [], [], timeout)
+            if not ready:
+                raise TimeoutError("exiftool daemon timed out")
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                raise EOFError("exiftool daemon exited")
+            buf += chunk
+            end = buf.find(sentinel)
+            if end != -1:
+                if buf[end + len(sentinel):].strip():
+                    raise EOFError("exiftool daemon wrote past its end marker")
+                return bytes(buf[:end])
+
+    def execute(self, path: str, timeout: float = EXIFTOOL_TIMEOUT_S) -> Optional[str]:
+        """Returns exiftool's stdout for `path`, or None if the daemon can't serve it now."""
+        if "\n" in path or not self._lock.acquire(blocking=False):
+            return None
+        try:
+            proc = self._start()
+            token = secrets.randbits(64)
+            proc.stdin.write(f"{path}\n-execute{token}\n".encode("utf-8", errors="surrogateescape"))
+            proc.stdin.flush()
+            out = self._read_until(proc, f"{{ready{token}}}".encode(), timeout)
+            return out.decode("utf-8", errors="replace").strip()
+        except (OSError, TimeoutError, EOFError):
+            self._kill()
+            return None
+        finally:
+            self._lock.release()
+
+    def restart(self) -> None:
+        """Drops the current process (after a response it can't vouch for); the next request starts a new one."""
+        with self._lock:
+            self._kill()
+
+    def _kill(self) -> None:
+        proc, self._proc = self._proc, None
+        if proc is not None and proc.poll() is None:
+            proc.kill()
+            proc.wait()
+
+    def close(self) -> None:
+        proc, self._proc = self._proc, None
+        if proc is None or proc.poll() is not None:
+            return
+        try:
+            proc.stdin.write(b"-stay_open\nFalse\n")
+            proc.stdin.flush()
+            proc.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            proc.kill()
+            proc.wait()
+
+
+_exiftool_daemon = _ExifToolDaemon()
+atexit.register(_exiftool_daemon.close)
+os.register_at_fork(after_in_child=_exiftool_daemon._after_fork)
+
+
+def _parse_exiftool(out: str) -> Dict[str, Any]:
+    arr = json.loads(out)
+    return arr[0] if arr else {"_status": "empty"}
+
+
 def extract_exiftool(path: str) -> Dict[str, Any]:
     if not which("exiftool"):
         return {"_status": "missing_exiftool"}
-    code, out, err = run_cmd(["exiftool", "-json", "-G", "-a", "-s", path], timeout=25)
+    out = _exiftool_daemon.execute(path)
+    if out == "":
+        # stderr isn't captured in daemon mode; unreadable files just produce no JSON
+        return {"_status": "error", "_error": "exiftool produced no output"}
+    if out is not None:
+        try:
+            return _parse_exiftool(out)
+        except Exception:
+            # the daemon's stream can't be trusted past a bad response: restart it and
+            # redo this file in a one-shot process
+            _exiftool_daemon.restart()
+    code, out, err = run_cmd(["exiftool", *EXIFTOOL_ARGS, path], timeout=EXIFTOOL_TIMEOUT_S)
     if code != 0:
         return {"_status": "error", "_error": err[:400]}
     try:
-        arr = json.loads(out)
-        return arr[0] if arr else {"_status": "empty"}
+        return _parse_exiftool(out)
     except Exception:
         return {"_status": "parse_error"}
 
+# Only what the pipeline reads: container duration/encoder (anomalies, transformation
+# hints) and per-stream type/shape.
+FFPROBE_ENTRIES = (
+    "format=filename,format_name,duration,size,bit_rate"
+    ":format_tags=encoder,ENCODER"
+    ":stream=index,codec_type,codec_name,width,height"
+)
+
+
+FFPROBE_ARGS = ["-v", "error", "-threads", "0", "-show_entries", FFPROBE_ENTRIES, "-of", "json"]
+C2PATOOL_ARGS = ["--json"]
+
+# argv (minus the binary and path) each cached extractor runs with. It is part of the
+# extract cache key, so changing flags invalidates payloads of the old shape.
+EXTRACT_ARGS: Dict[str, Tuple[str, ...]] = {
+    "exiftool": tuple(EXIFTOOL_ARGS),
+    "ffprobe": tuple(FFPROBE_ARGS),
+    "c2patool": tuple(C2PATOOL_ARGS),
+}
+
+
 def extract_ffprobe(path: str) -> Dict[str, Any]:
     if not which("ffprobe"):
         return {"_status": "missing_ffprobe"}
-    code, out, err = run_cmd(["ffprobe", "-v", "error", "-show_format", "-show_streams", "-of", "json", path], timeout=25)
+    code, out, err = run_cmd(["ffprobe", *FFPROBE_ARGS, path], timeout=25)
     if code != 0:
         return {"_status": "error", "_error": err[:400]}
     try:
@@ -112,7 +258,7 @@ def extract_ffprobe(path: str) -> Dict[str, Any]:
 def extract_c2pa(path: str) -> Dict[str, Any]:
     if not which("c2patool"):
         return {"_status": "missing_c2patool"}
-    code, out, err = run_cmd(["c2patool", "--json", path], timeout=30)
+    code, out, err = run_cmd(["c2patool", *C2PATOOL_ARGS, path], timeout=30)
     if code == 0 and out:
         try:
             return json.loads(out)
@@ -177,20 +323,102 @@ def transformation_hints(meta: Dict[str, Any], ff: Dict[str, Any]) -> Dict[str,
         hints["notes"].append("No strong transformation clues detected from available signals.")
     return hints
 
+_C2PA_TERMS_RE = re.compile(r"invalid|valid|verified|passed|failed|broken|manifest|c2pa")
+_C2PA_PRESENT_TERMS = frozenset({"manifest", "c2pa"})
+_C2PA_FAILED_TERMS = frozenset({"invalid", "failed", "broken"})
+
+
+# C2PA validation status codes (spec section 15.2) end in an outcome word; anything
+# not listed here (e.g. "*.ocsp.skipped") is informational.
+_C2PA_SUCCESS_SUFFIXES = (".validated", ".trusted", ".match", ".accessible", ".insideValidity")
+_C2PA_FAILURE_SUFFIXES = (
+    ".mismatch", ".invalid", ".untrusted", ".revoked", ".expired", ".missing",
+    ".malformed", ".outsideValidity", ".inaccessible", ".unsupported", ".unknown",
+)
+
+
+def _code_outcome(entry: Any) -> Optional[bool]:
+    code = entry.get("code") if isinstance(entry, dict) else entry
+    if not isinstance(code, str):
+        return None
+    if code.endswith(_C2PA_FAILURE_SUFFIXES) or ".failure" in code:
+        return False
+    if code.endswith(_C2PA_SUCCESS_SUFFIXES):
+        return True
+    return None
+
+
+def _walk_c2pa(c2pa: Dict[str, Any]) -> Optional[Tuple[bool, str]]:
+    """
+    (present, validation) from c2patool's structured report, or None when the input
+    doesn't look like one. Only the manifest and validation fields are read.
+    """
+    manifests = c2pa.get("manifests")
+    active = c2pa.get("active_manifest")
+    if manifests is None and active is None:
+        return None
+    present = bool(manifests or active)
+
+    outcomes = [_code_outcome(e) for e in c2pa.get("validation_status") or []]
+    # c2patool >= 0.10 also reports an overall state and per-manifest results
+    state = c2pa.get("validation_state")
+    if isinstance(state, str):
+        outcomes.append(state.lower() != "invalid")
+    active_results = (c2pa.get("validation_results") or {}).get("activeManifest") or {}
+    outcomes.extend(False for _ in active_results.get("failure") or [])
+    outcomes.extend(True for _ in active_results.get("success") or [])
+
+    if False in outcomes:
+        return present, "FAILED"
+    if True in outcomes:
+        return present, "VALID"
+    return present, "UNKNOWN"
+
+
+def _scan_c2pa_text(c2pa: Dict[str, Any]) -> Tuple[bool, str]:
+    # Keyword fallback for text-only or unfamiliar output. One pass over the
+    # serialised report; "invalid" is matched before its "valid" suffix.
+    present = valid = failed = False
+    for m in _C2PA_TERMS_RE.finditer(json.dumps(c2pa, ensure_ascii=False, default=str).lower()):
+        term = m.group(0)
+        if term in _C2PA_PRESENT_TERMS:
+            present = True
+        elif term in _C2PA_FAILED_TERMS:
+            failed = True
+            if present:
+                break
+        else:
+            valid = True
+    return present, "FAILED" if failed else "VALID" if valid else "UNKNOWN"
+
+
+_C2PA_UNAVAILABLE_STATUSES = {"missing_c2patool", "error", "parse_error"}
+
+
+def c2pa_validation(c2pa: Dict[str, Any]) -> Tuple[bool, str]:
+    """
+    (manifest present, "VALID" | "FAILED" | "UNKNOWN") for a c2patool report: the
+    structured walk when the report has that shape, else the keyword scan. The single
+    source for both classify_provenance and the pipeline's c2pa_summary.
+    """
+    try:
+        walked = _walk_c2pa(c2pa)
+    except (AttributeError, KeyError, TypeError):
+        walked = None
+    return walked if walked is not None else _scan_c2pa_text(c2pa)
+
+
 def classify_provenance(c2pa: Dict[str, Any], meta: Dict[str, Any]) -> Tuple[str, str]:
     state = "UNVERIFIABLE_NO_PROVENANCE"
     summary = "No cryptographic provenance proof was found (no usable C2PA manifest)."
 
-    if c2pa and c2pa.get("_status") not in {"missing_c2patool", "error"}:
-        js = json.dumps(c2pa, ensure_ascii=False).lower()
-        has_manifest = ("manifest" in js) or ("c2pa" in js)
-        looks_valid = (("valid" in js) or ("verified" in js) or ("passed" in js)) and not (("failed" in js) or ("invalid" in js) or ("broken" in js))
-        looks_failed = ("failed" in js) or ("invalid" in js) or ("broken" in js)
+    if isinstance(c2pa, dict) and c2pa and c2pa.get("_status") not in _C2PA_UNAVAILABLE_STATUSES:
+        has_manifest, validation = c2pa_validation(c2pa)
 
-        if has_manifest and looks_valid:
+        if has_manifest and validation == "VALID":
             state = "VERIFIED_ORIGINAL"
             summary = "C2PA manifest detected and validation signals indicate an intact trust chain."
-        elif has_manifest and looks_failed:
+        elif has_manifest and validation == "FAILED":
             state = "ALTERED_OR_BROKEN_PROVENANCE"
             summary = "C2PA manifest detected but validation signals indicate a broken or altered trust chain."
         elif has_manifest:
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import datetime
+import hashlib
+import json
+import os
+import sqlite3
+import stat
+import threading
+from typing import Any, Callable, Dict, Optional, Sequence
+
+# Extractor outputs (exiftool/ffprobe/c2patool JSON) keyed by file SHA-256, tool version
+# and extractor arguments, so re-analysing the same bytes skips the subprocesses.
+# Set to "" to disable.
+EXTRACT_CACHE_PATH = os.getenv("TRUTHSIG_EXTRACT_CACHE", "/tmp/truthsig_extract_cache.db")
+
+# Bounds on the cache: rows older than the max age go first, then the oldest rows
+# beyond the row cap. Pruned when the cache is opened and every PRUNE_EVERY inserts.
+EXTRACT_CACHE_MAX_AGE_DAYS = float(os.getenv("TRUTHSIG_EXTRACT_CACHE_MAX_AGE_DAYS", "30"))
+EXTRACT_CACHE_MAX_ROWS = int(os.getenv("TRUTHSIG_EXTRACT_CACHE_MAX_ROWS", "50000"))
+PRUNE_EVERY = 500
+
+# Statuses that describe the environment or a failed run, not the file; never cached.
+_UNCACHEABLE_STATUSES = {
+    "missing_exiftool",
+    "missing_ffprobe",
+    "missing_c2patool",
+    "error",
+    "parse_error",
+}
+
+
+
+def is_cacheable(payload: Any) -> bool:
+    return isinstance(payload, dict) and payload.get("_status") not in _UNCACHEABLE_STATUSES
+
+
+_lock = threading.Lock()
+_con: Optional[sqlite3.Connection] = None
+_puts_since_prune = 0
+
+
+def _now() -> str:
+    return datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+
+def _prune(con: sqlite3.Connection) -> None:
+    # created_at is always UTC isoformat, so text order is time order
+    cutoff = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=EXTRACT_CACHE_MAX_AGE_DAYS)
+    con.execute("DELETE FROM extracts WHERE created_at < ?", (cutoff.isoformat(),))
+    con.execute(
+        "DELETE FROM extracts WHERE rowid IN "
+        "(SELECT rowid FROM extracts ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+        (EXTRACT_CACHE_MAX_ROWS,),
+    )
+    con.commit()
+
+
+def _connect() -> Optional[sqlite3.Connection]:
+    global _con
+    if _con is None and EXTRACT_CACHE_PATH:
+        con = sqlite3.connect(EXTRACT_CACHE_PATH, check_same_thread=False, timeout=5)
+        # WAL lets several workers read while one writes
+        con.execute("PRAGMA journal_mode=WAL")
+        con.execute(
+            """
+            CREATE TABLE IF NOT EXISTS extracts (
+                sha256 TEXT NOT NULL,
+                tool TEXT NOT NULL,
+                version TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                PRIMARY KEY (sha256, tool, version)
+            );
+            """
+        )
+        con.execute("CREATE INDEX IF NOT EXISTS extracts_created_at ON extracts (created_at)")
+        _prune(con)
+        _con = con
+    return _con
+
+
+def _get(sha256: str, tool: str, version: str) -> Optional[Dict[str, Any]]:
+    with _lock:
+        con = _connect()
+        if con is None:
+            return None
+        row = con.execute(
+            "SELECT payload FROM extracts WHERE sha256=? AND tool=? AND version=?",
+            (sha256, tool, version),
+        ).fetchone()
+    return json.loads(row[0]) if row else None
+
+
+def _put(sha256: str, tool: str, version: str, payload: Dict[str, Any]) -> None:
+    global _puts_since_prune
+    with _lock:
+        con = _connect()
+        if con is None:
+            return
+        con.execute(
+            "INSERT OR REPLACE INTO extracts (sha256, tool, version, payload, created_at) VALUES (?,?,?,?,?)",
+            (
+                sha256,
+                tool,
+                version,
+                json.dumps(payload, ensure_ascii=False),
+                _now(),
+            ),
+        )
+        con.commit()
+        _puts_since_prune += 1
+        if _puts_since_prune >= PRUNE_EVERY:
+            _puts_since_prune = 0
+            _prune(con)
+
+
+def _exif_time(ts: float) -> str:
+    # exiftool's default date format, e.g. "2024:05:01 10:20:30+00:00"
+    s = datetime.datetime.fromtimestamp(ts).astimezone().strftime("%Y:%m:%d %H:%M:%S%z")
+    return s[:-2] + ":" + s[-2:]
+
+
+def _refresh_file_fields(tool: str, payload: Dict[str, Any], path: str) -> Dict[str, Any]:
+    """
+    Cached output describes the bytes, but a few fields describe the file on disk
+    (name, directory, filesystem times, permissions). Re-derive those for `path`.
+    """
+    if tool == "exiftool":
+        st = os.stat(path)
+        fresh = {
+            "SourceFile": path,
+            "File:FileName": os.path.basename(path),
+            "File:Directory": os.path.dirname(path) or ".",
+            "File:FileModifyDate": _exif_time(st.st_mtime),
+            "File:FileAccessDate": _exif_time(st.st_atime),
+            "File:FileInodeChangeDate": _exif_time(st.st_ctime),
+            "File:FilePermissions": stat.filemode(st.st_mode),
+        }
+        payload.update((k, v) for k, v in fresh.items() if k in payload)
+    elif tool == "ffprobe" and isinstance(payload.get("format"), dict):
+        payload["format"]["filename"] = path
+    return payload
+
+
+def _version_key(version: str, args: Sequence[str]) -> str:
+    # the flags decide the payload's shape as much as the binary does
+    if not args:
+        return version
+    digest = hashlib.blake2b("\0".join(args).encode("utf-8"), digest_size=8).hexdigest()
+    return f"{version}+{digest}"
+
+
+def cached_extract(
+    tool: str,
+    version: Optional[str],
+    sha256: Optional[str],
+    path: str,
+    extract: Callable[[str], Dict[str, Any]],
+    args: Sequence[str] = (),
+) -> Dict[str, Any]:
+    """
+    Returns extract(path), served from the cache when the same bytes were already
+    processed by the same tool version with the same arguments. Failures are never
+    cached, and cache errors fall back to running the extractor.
+    """
+    if not sha256 or not version:
+        return extract(path)
+    version = _version_key(version, args)
+
+    try:
+        hit = _get(sha256, tool, version)
+        if hit is not None:
+            return _refresh_file_fields(tool, hit, path)
+    except (sqlite3.Error, OSError, ValueError):
+        pass
+
+    result = extract(path)
+    if is_cacheable(result):
+        try:
+            _put(sha256, tool, version, result)
+        except (sqlite3.Error, OSError, TypeError, ValueError):
+            pass
+    return result
@@ -1,62 +1,158 @@
 from __future__ import annotations
 
+import functools
 import io
 import math
 import os
 import tempfile
+import threading
 import base64
-from typing import Any, Dict, List, Optional
+import bisect
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 
-from PIL import Image, ImageChops, ImageStat
+from backend.utils import run_cmd, run_cmd_bytes, which
 
-from backend.utils import run_cmd, which
+if TYPE_CHECKING:
+    import numpy as np
+    from PIL import Image
 
 ARTIFACT_DIR = os.getenv(
     "TRUTHSIG_ARTIFACT_DIR",
     "/tmp/truthsig_artifacts"
 )
 
+# ELA measures the 8x8 JPEG block grid, so the round trip always runs at full
+# resolution; only the images saved for display (heatmaps, frame thumbnails) are
+# bounded to this size.
+ELA_MAX_DIM = 1024
+
+# Rows diffed per pass, so the int16 scratch covers a band rather than the whole
+# frame (a 4000x3000 image would otherwise need ~72 MB for it).
+ELA_BAND_ROWS = 256
+
+
+# PIL and NumPy are imported on first use so that importing this module (main.py
+# only needs ARTIFACT_DIR) does not load the imaging/array extensions.
+@functools.lru_cache(maxsize=None)
+def _np():
+    import numpy
+
+    return numpy
+
+
+@functools.lru_cache(maxsize=None)
+def _pil_image():
+    from PIL import Image
+
+    return Image
+
+
+# ELA amplification (x10, clipped to 255) as a 256-entry table over |diff|.
+@functools.lru_cache(maxsize=None)
+def _ela_lut():
+    np = _np()
+    return np.minimum(np.arange(256, dtype=np.uint16) * 10, 255).astype(np.uint8)
+
+
+# Per-thread scratch for ELA: the JPEG round-trip buffer, a band-sized diff array
+# and the full-size output array, reallocated only when the frame shape changes.
+_ela_scratch = threading.local()
+
+
+def _ela_buffers(shape: Tuple[int, ...]) -> Tuple[io.BytesIO, np.ndarray, np.ndarray]:
+    np = _np()
+    scratch = _ela_scratch
+    buffer = getattr(scratch, "buffer", None)
+    if buffer is None:
+        buffer = scratch.buffer = io.BytesIO()
+    buffer.seek(0)
+    buffer.truncate()
+    if getattr(scratch, "shape", None) != shape:
+        scratch.shape = shape
+        scratch.diff_i16 = np.empty((min(shape[0], ELA_BAND_ROWS),) + shape[1:], dtype=np.int16)
+        scratch.out_u8 = np.empty(shape, dtype=np.uint8)
+    return buffer, scratch.diff_i16, scratch.out_u8
+
 
 def _ensure_dir(path: str) -> str:
     os.makedirs(path, exist_ok=True)
     return path
 
 
-def _safe_mean(stat: ImageStat.Stat) -> float:
-    if not stat.mean:
-        return 0.0
-    return float(sum(stat.mean) / len(stat.mean))
+def _artifact_out_dir(path: str, output_dir: Optional[str]) -> str:
+    # One makedirs call; it creates ARTIFACT_DIR too when out_dir is nested under it.
+    base = os.path.splitext(os.path.basename(path))[0]
+    return _ensure_dir(output_dir or os.path.join(ARTIFACT_DIR, f"ela_{base}"))
 
 
-def image_ela(path: str, output_dir: Optional[str] = None) -> Dict[str, Any]:
-    try:
-        _ensure_dir(ARTIFACT_DIR)
-        base = os.path.splitext(os.path.basename(path))[0]
-        out_dir = _ensure_dir(output_dir or os.path.join(ARTIFACT_DIR, f"ela_{base}"))
+def _bounded(img: Image.Image) -> Image.Image:
+    # Display copy fitting within ELA_MAX_DIM; never used as ELA input.
+    if max(img.size) <= ELA_MAX_DIM:
+        return img
+    scale = ELA_MAX_DIM / max(img.size)
+    new_size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+    return img.resize(new_size, _pil_image().BILINEAR)
 
-        with Image.open(path) as img:
-            img = img.convert("RGB")
-            buffer = io.BytesIO()
-            img.save(buffer, "JPEG", quality=85)
-            buffer.seek(0)
 
-            with Image.open(buffer) as recompressed:
-                recompressed = recompressed.convert("RGB")
-                diff = ImageChops.difference(img, recompressed)
-                diff = diff.point(lambda x: min(255, x * 10))
+def _write_heatmap(scaled: np.ndarray, out_dir: str, stem: str, fmt: str) -> Tuple[str, str]:
+    heatmap = _bounded(_pil_image().fromarray(scaled))
+    fmt = fmt.upper()
+    if fmt == "JPEG":
+        heatmap_path = os.path.join(out_dir, f"{stem}.jpg")
+        heatmap.save(heatmap_path, "JPEG", quality=85)
+    else:
+        heatmap_path = os.path.join(out_dir, f"{stem}.png")
+        heatmap.save(heatmap_path, fmt)
 
-                heatmap_path = os.path.join(out_dir, "ela_heatmap.png")
-                diff.save(heatmap_path, "PNG")
+    if not os.path.exists(heatmap_path):
+        raise RuntimeError("ELA heatmap was not written to disk")
 
-                if not os.path.exists(heatmap_path):
-                    raise RuntimeError("ELA heatmap was not written to disk")
+    # Store the artifact inline (base64) so GET works even if filesystem is ephemeral
+    with open(heatmap_path, "rb") as f:
+        heatmap_b64 = base64.b64encode(f.read()).decode("utf-8")
+    return heatmap_path, heatmap_b64
 
-                # Store the artifact inline (base64) so GET works even if filesystem is ephemeral
-                with open(heatmap_path, "rb") as f:
-                    heatmap_b64 = base64.b64encode(f.read()).decode("utf-8")
 
-                stat = ImageStat.Stat(diff)
-                mean_diff = _safe_mean(stat)
+def _image_ela_from_pil(
+    img: Image.Image,
+    out_dir: str,
+    heatmap_stem: str = "ela_heatmap",
+    *,
+    write_heatmap: bool = True,
+    heatmap_format: str = "PNG",
+) -> Dict[str, Any]:
+    try:
+        np = _np()
+        Image = _pil_image()
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+        buffer, diff, scaled = _ela_buffers((img.height, img.width, 3))
+        # Pin the encoder settings (4:2:0, baseline, no Huffman optimisation) so the
+        # round trip is well-defined and takes libjpeg-turbo's fastest path.
+        img.save(buffer, "JPEG", quality=85, subsampling=2, optimize=False, progressive=False)
+        buffer.seek(0)
+
+        with Image.open(buffer) as recompressed:
+            recompressed = recompressed.convert("RGB")
+            b = np.asarray(recompressed)
+        a = np.asarray(img)
+
+        # Amplified |original - recompressed|, one band of rows at a time; the score
+        # is the mean of the amplified diff.
+        lut = _ela_lut()
+        for top in range(0, img.height, ELA_BAND_ROWS):
+            rows = slice(top, top + ELA_BAND_ROWS)
+            band = diff[: min(ELA_BAND_ROWS, img.height - top)]
+            np.subtract(a[rows], b[rows], out=band, dtype=np.int16)
+            np.abs(band, out=band)
+            np.take(lut, band, out=scaled[rows])
+        mean_diff = float(scaled.mean())
+
+        heatmap_path = None
+        heatmap_b64 = None
+        if write_heatmap:
+            heatmap_path, heatmap_b64 = _write_heatmap(scaled, out_dir, heatmap_stem, heatmap_format)
 
         status = "SUSPICIOUS" if mean_diff >= 25.0 else "CLEAR"
         summary = f"ELA mean diff intensity: {mean_diff:.1f}"
@@ -77,9 +173,159 @@ def image_ela(path: str, output_dir: Optional[str] = None) -> Dict[str, Any]:
         }
 
 
+def image_ela(
+    path: str,
+    output_dir: Optional[str] = None,
+    *,
+    write_heatmap: bool = True,
+    heatmap_format: str = "PNG",
+) -> Dict[str, Any]:
+    try:
+        out_dir = _artifact_out_dir(path, output_dir)
+
+        with _pil_image().open(path) as img:
+            return _image_ela_from_pil(
+                img,
+                out_dir,
+                write_heatmap=write_heatmap,
+                heatmap_format=heatmap_format,
+            )
+    except Exception as exc:
+        return {
+            "status": "ERROR",
+            "explanation": f"ELA failed: {exc}",
+        }
+
+
+def _thumbnail_and_score(frame: Image.Image, frame_path: str, out_dir: str) -> Dict[str, Any]:
+    # Kept in one task: PIL stores encoder settings on the image, so one frame must not be saved concurrently.
+    _bounded(frame).save(frame_path, "JPEG", quality=90)
+    # Score only (at full resolution); heatmaps are rendered later for the flagged frames.
+    return _image_ela_from_pil(frame, out_dir, write_heatmap=False)
+
+
+def extract_frames_rgb(
+    path: str,
+    timestamps: List[float],
+    *,
+    keyframes_only: bool = False,
+) -> Tuple[List[Tuple[float, Image.Image]], str]:
+    """
+    Decodes the first frame at or after each timestamp in a single ffmpeg pass and
+    returns (frame_time_s, image) pairs as full-resolution in-memory RGB images (plus
+    ffmpeg's stderr for diagnostics). Timestamps and returned times
+    are relative to the video stream's first frame, as with `-ss` seeking, so files
+    with a nonzero start_time are sampled at the same offsets.
+    Frames are piped as PPM (raw RGB24 with a tiny size header), so nothing is
+    written to disk and the output size does not have to be known up front.
+    With keyframes_only, the decoder skips every non-key frame, so the selected frame
+    is the first keyframe at or after each timestamp; several timestamps can land on
+    the same keyframe, which is why the actual frame times are returned (see
+    _assign_frames).
+    """
+    select_expr = "+".join(f"lt(prev_t,{ts:.2f})*gte(t,{ts:.2f})" for ts in timestamps)
+    cmd = ["ffmpeg", "-hide_banner", "-nostats", "-v", "info"]
+    if keyframes_only:
+        cmd += ["-skip_frame", "nokey"]
+    cmd += [
+        "-i",
+        path,
+        "-vf",
+        # pts are absolute; rebase them so t (and showinfo's pts_time) start at 0
+        f"setpts=PTS-STARTPTS,select='{select_expr}',showinfo",
+        "-vsync",
+        "vfr",
+        "-f",
+        "image2pipe",
+        "-c:v",
+        "ppm",
+        "-",
+    ]
+    code, out, err = run_cmd_bytes(cmd, timeout=60)
+
+    # showinfo logs one line per emitted frame (at info level), carrying its pts_time.
+    frame_times: List[float] = []
+    log_lines: List[str] = []
+    for line in err.splitlines():
+        if "Parsed_showinfo" not in line:
+            log_lines.append(line)
+            continue
+        _, sep, rest = line.partition(" pts_time:")
+        if sep:
+            try:
+                frame_times.append(float(rest.split(None, 1)[0]))
+            except (ValueError, IndexError):
+                pass
+
+    frames: List[Tuple[float, Image.Image]] = []
+    data = memoryview(out)
+    pos = 0
+    try:
+        while pos < len(data) and len(frames) < len(frame_times):
+            # PPM header: b"P6\n<width> <height>\n<maxval>\n"
+            header_end = pos
+            for _ in range(3):
+                header_end = out.index(b"\n", header_end) + 1
+            magic, dims, _maxval = bytes(data[pos:header_end]).split(b"\n")[:3]
+            if magic != b"P6":
+                raise ValueError("unexpected frame header")
+            width, height = (int(v) for v in dims.split())
+            size = width * height * 3
+            image = _pil_image().frombytes("RGB", (width, height), data[header_end : header_end + size])
+            frames.append((frame_times[len(frames)], image))
+            pos = header_end + size
+    except ValueError:
+        pass
+
+    # At info level stderr also carries stream/banner lines; failures are reported last.
+    return frames, ("\n".join(log_lines[-3:]) if code != 0 else "")
+
+
+def _assign_frames(
+    timestamps: List[float],
+    frames: List[Tuple[float, Image.Image]],
+    max_offset: float,
+) -> Tuple[List[Tuple[float, Tuple[float, Image.Image]]], List[float]]:
+    """
+    Pairs requested timestamps with the frames extract_frames_rgb returned. Each
+    timestamp's frame is the first one at or after it; a frame serves only one
+    timestamp, and only if it lies within max_offset of it. Returns the
+    (timestamp, frame) pairs and the timestamps left without a distinct frame (several
+    samples inside one GOP, or past the end of the stream).
+    """
+    times = [t for t, _ in frames]
+    used = set()
+    assigned: List[Tuple[float, Tuple[float, Image.Image]]] = []
+    unserved: List[float] = []
+    for ts in timestamps:
+        # showinfo prints pts_time rounded to microseconds
+        i = bisect.bisect_left(times, ts - 1e-4)
+        if i < len(frames) and i not in used and times[i] - ts <= max_offset:
+            used.add(i)
+            assigned.append((ts, frames[i]))
+        else:
+            unserved.append(ts)
+    return assigned, unserved
+
+
 def _duration_from_ffprobe(path: str) -> Optional[float]:
     if not which("ffprobe"):
         return None
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    try:
+        return _probe_duration_cached(path, st.st_mtime_ns, st.st_size)
+    except ValueError:
+        return None
+
+
+# Keyed on (path, mtime, size) so retries/re-scores of an unchanged file skip the ffprobe spawn.
+# Failures raise instead of returning None: lru_cache doesn't store exceptions, so a
+# transient ffprobe failure or timeout is retried on the next call.
+@functools.lru_cache(maxsize=128)
+def _probe_duration_cached(path: str, mtime_ns: int, size: int) -> float:
     code, out, _ = run_cmd(
         [
             "ffprobe",
@@ -94,11 +340,8 @@ def _duration_from_ffprobe(path: str) -> Optional[float]:
         timeout=20,
     )
     if code != 0 or not out:
-        return None
-    try:
-        return float(out.strip())
-    except ValueError:
-        return None
+        raise ValueError(f"ffprobe exited {code} without a duration")
+    return float(out.strip())
 
 
 def video_forensics(
@@ -110,10 +353,13 @@ def video_forensics(
 ) -> Dict[str, Any]:
     """
     Extracts N frames from the video, runs ELA on each, and returns:
-      - frame thumbnails
+      - frame thumbnails (JPEG copies of the extracted frames, bounded to ELA_MAX_DIM;
+        scoring uses the full-resolution frames)
       - per-frame scores
-      - top flagged frames
-      - timeline markers (including per-frame heatmap + base64 fallback)
+      - top flagged frames (`index` into frame_thumbnails, `marker_index` into
+        timeline_markers, which is what kind=frame_heatmap artifacts are looked up by)
+      - timeline markers sorted by time_s, including unsampled timestamps (with
+        per-frame heatmap + base64 fallback)
     Fixes implemented:
       1) Uses the provided output_dir parameter correctly (was previously a NameError in older codebases).
       2) Stores heatmap_b64 for timeline_markers and flagged_frames so artifact serving works on ephemeral/multi-instance hosts.
@@ -133,94 +379,128 @@ def video_forensics(
             "explanation": "Video duration unavailable; cannot sample frames reliably.",
         }
 
-    _ensure_dir(ARTIFACT_DIR)
-    base = os.path.splitext(os.path.basename(path))[0]
-    out_dir = _ensure_dir(output_dir or os.path.join(ARTIFACT_DIR, f"ela_{base}"))
+    out_dir = _artifact_out_dir(path, output_dir)
 
-    # Sample frames evenly across the duration (skip very start/end)
+    # Sample frames evenly across the duration (skip very start/end). The select
+    # filter compares at 2 decimals, so the timestamps are rounded to match.
     step = duration / (frame_count + 1)
-    timestamps = [step * (i + 1) for i in range(frame_count)]
+    timestamps = [round(step * (i + 1), 2) for i in range(frame_count)]
 
     frame_thumbnails: List[str] = []
     frame_scores: List[float] = []
     flagged_frames: List[Dict[str, Any]] = []
-    timeline_markers: List[Dict[str, Any]] = []
-
-    for idx, ts in enumerate(timestamps):
-        frame_path = os.path.join(out_dir, f"frame_{idx:02d}.jpg")
-
-        code, _, err = run_cmd(
-            [
-                "ffmpeg",
-                "-ss",
-                f"{ts:.2f}",
-                "-i",
-                path,
-                "-frames:v",
-                "1",
-                "-q:v",
-                "2",
-                frame_path,
-                "-y",
-            ],
-            timeout=30,
-        )
-
-        if code != 0 or not os.path.exists(frame_path):
-            timeline_markers.append(
-                {
-                    "time_s": ts,
-                    "status": "ERROR",
-                    "note": (err[:200] if err else "Frame extraction failed."),
-                }
+    # one marker per frame, in frame order; merged with the unsampled timestamps below
+    frame_markers: List[Dict[str, Any]] = []
+
+    # ELA only needs spatially coherent frames, so sample keyframes (no inter-frame
+    # decoding). A keyframe only stands in for a timestamp if it is within half a
+    # sampling step; samples that share a GOP, sit far from a keyframe or lie past
+    # the last one fall back to a full decode of just those timestamps.
+    tolerance = step / 2
+    keyframes, err = extract_frames_rgb(path, timestamps, keyframes_only=True)
+    sampled, missing = _assign_frames(timestamps, keyframes, tolerance)
+    if missing:
+        decoded, more_err = extract_frames_rgb(path, missing)
+        more, missing = _assign_frames(missing, decoded, tolerance)
+        sampled += more
+        err = more_err or err
+    sampled.sort(key=lambda s: s[0])
+    frames = [frame for _, frame in sampled]
+    frame_paths = [os.path.join(out_dir, f"frame_{idx:02d}.jpg") for idx in range(len(frames))]
+
+    # Frames are independent and PIL/NumPy release the GIL while encoding and diffing,
+    # so thumbnail writes and ELA scoring fan out across cores.
+    with ThreadPoolExecutor(max_workers=max(1, min(len(frames), os.cpu_count() or 1))) as pool:
+        futures = [
+            pool.submit(_thumbnail_and_score, frame, frame_path, out_dir)
+            for (_, frame), frame_path in zip(frames, frame_paths)
+        ]
+
+        for idx, (ts, _) in enumerate(frames):
+            frame_path = frame_paths[idx]
+            try:
+                ela = futures[idx].result()
+            except OSError as exc:
+                frame_markers.append(
+                    {
+                        "time_s": ts,
+                        "status": "ERROR",
+                        "note": f"Frame thumbnail could not be written: {exc}"[:200],
+                    }
+                )
+                continue
+
+            frame_thumbnails.append(frame_path)
+            ela_status = ela.get("status")
+
+            if ela_status == "ERROR":
+                frame_markers.append(
+                    {
+                        "time_s": ts,
+                        "status": "ERROR",
+                        "thumbnail_path": frame_path,
+                        "note": ela.get("explanation", "ELA failed for this frame."),
+                    }
+                )
+                frame_scores.append(0.0)
+                continue
+
+            mean_diff = float(ela.get("mean_diff") or 0.0)
+            frame_scores.append(mean_diff)
+
+            marker = {
+                "time_s": ts,
+                "status": "OK",
+                "score": mean_diff,
+                "thumbnail_path": frame_path,
+                "heatmap_path": None,
+                "heatmap_b64": None,
+            }
+            frame_markers.append(marker)
+
+            if mean_diff >= 25.0:
+                flagged_frames.append(
+                    {
+                        "index": idx,
+                        "time_s": ts,
+                        "score": mean_diff,
+                        "thumbnail_path": frame_path,
+                        "heatmap_path": None,
+                        "heatmap_b64": None,
+                    }
+                )
+
+        # Keep top 3 flagged frames by score, and render (JPEG) heatmaps for just those
+        flagged_frames = sorted(flagged_frames, key=lambda f: f.get("score", 0), reverse=True)[:3]
+        flagged_elas = list(
+            pool.map(
+                lambda f: _image_ela_from_pil(
+                    frames[f["index"]][1], out_dir, f"frame_{f['index']:02d}_ela", heatmap_format="JPEG"
+                ),
+                flagged_frames,
             )
-            continue
-
-        frame_thumbnails.append(frame_path)
-
-        # Run ELA on the extracted frame. image_ela now returns heatmap_b64 for resilience.
-        ela = image_ela(frame_path, output_dir=out_dir)
-        ela_status = ela.get("status")
-
-        if ela_status == "ERROR":
-            timeline_markers.append(
-                {
-                    "time_s": ts,
-                    "status": "ERROR",
-                    "thumbnail_path": frame_path,
-                    "note": ela.get("explanation", "ELA failed for this frame."),
-                }
-            )
-            frame_scores.append(0.0)
-            continue
-
-        mean_diff = float(ela.get("mean_diff") or 0.0)
-        frame_scores.append(mean_diff)
+        )
 
-        marker = {
+    timeline_markers = frame_markers + [
+        {
             "time_s": ts,
-            "status": "OK",
-            "score": mean_diff,
-            "thumbnail_path": frame_path,
-            "heatmap_path": ela.get("heatmap_path"),
-            "heatmap_b64": ela.get("heatmap_b64"),
+            "status": "ERROR",
+            "note": (err[:200] if err else "No distinct frame could be decoded near this timestamp."),
         }
-        timeline_markers.append(marker)
-
-        if mean_diff >= 25.0:
-            flagged_frames.append(
-                {
-                    "index": idx,
-                    "time_s": ts,
-                    "score": mean_diff,
-                    "thumbnail_path": frame_path,
-                    "heatmap_path": ela.get("heatmap_path"),
-                    "heatmap_b64": ela.get("heatmap_b64"),
-                }
-            )
-
-    # Keep top 3 flagged frames by score
-    flagged_frames = sorted(flagged_frames, key=lambda f: f.get("score", 0), reverse=True)[:3]
+        for ts in missing
+    ]
+    # the UI and report walk markers in time order; flagged frames record where
+    # theirs landed (marker_index) for frame_heatmap lookups
+    timeline_markers.sort(key=lambda m: m["time_s"])
+    marker_positions = {id(m): pos for pos, m in enumerate(timeline_markers)}
+
+    for flagged, ela in zip(flagged_frames, flagged_elas):
+        marker = frame_markers[flagged["index"]]
+        flagged["marker_index"] = marker_positions[id(marker)]
+        if ela.get("status") == "ERROR":
+            continue
+        flagged["heatmap_path"] = marker["heatmap_path"] = ela.get("heatmap_path")
+        flagged["heatmap_b64"] = marker["heatmap_b64"] = ela.get("heatmap_b64")
 
     # Compute average score across successfully-extracted frames (frame_scores includes 0.0 for per-frame ELA errors)
     avg_score = (sum(frame_scores) / len(frame_scores)) if frame_scores else 0.0
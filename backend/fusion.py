@@ -1,60 +1,107 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Tuple
+import bisect
+import heapq
+from typing import Any, Dict, List, Optional, Tuple
 
 
 Signal = Dict[str, Any]
 
 
-def _signal(
-    *,
-    key: str,
-    label: str,
-    value: Any,
-    severity: str,
-    weight: float,
-    evidence: Any,
-    explanation: str,
-    status: str,
-) -> Signal:
-    return {
-        "key": key,
-        "label": label,
-        "value": value,
-        "severity": severity,
-        "weight": weight,
-        "evidence": evidence,
-        "explanation": explanation,
-        "status": status,
-    }
-
-
-def _clamp(score: float) -> int:
-    if score < 0:
-        return 0
-    if score > 100:
-        return 100
-    return int(round(score))
+_BASE_SCORE = 50.0
+_LABEL_THRESHOLDS = (50, 75)
+_LABELS = ("LOW", "MEDIUM", "HIGH")
 
 
 def _label_for_score(score: int) -> str:
-    if score >= 75:
-        return "HIGH"
-    if score >= 50:
-        return "MEDIUM"
-    return "LOW"
+    return _LABELS[bisect.bisect_right(_LABEL_THRESHOLDS, score)]
 
 
 def _top_reasons(signals: List[Signal], limit: int = 3) -> List[str]:
-    ranked = sorted(signals, key=lambda s: abs(float(s.get("weight") or 0)), reverse=True)
-    reasons: List[str] = []
-    for s in ranked:
-        expl = s.get("explanation") or s.get("label")
-        if expl:
-            reasons.append(str(expl))
-        if len(reasons) >= limit:
-            break
-    return reasons
+    # nlargest is stable like sorted(..., reverse=True), so ties keep signal order
+    ranked = heapq.nlargest(
+        limit,
+        (s for s in signals if s.get("explanation") or s.get("label")),
+        key=lambda s: abs(float(s.get("weight") or 0)),
+    )
+    return [str(s.get("explanation") or s.get("label")) for s in ranked]
+
+
+# (input, state) -> (key, label, severity, weight, status, explanation, explanation_field)
+# explanation_field names a key on the input dict whose value, when present, replaces
+# the default explanation. ("provenance", "*") applies to any unlisted provenance state.
+_Rule = Tuple[str, str, str, int, str, str, Optional[str]]
+_RULES: Dict[Tuple[str, Any], _Rule] = {
+    ("provenance", "VERIFIED_ORIGINAL"): (
+        "provenance.verified", "Provenance verified", "POSITIVE", 25, "OK",
+        "C2PA provenance was present and verified, increasing trust.", None,
+    ),
+    ("provenance", "ALTERED_OR_BROKEN_PROVENANCE"): (
+        "provenance.broken", "Broken or altered provenance", "HIGH", -30, "FAIL",
+        "C2PA provenance was present but indicates a broken or altered trust chain.", None,
+    ),
+    ("provenance", "*"): (
+        "provenance.absent", "No cryptographic provenance", "INFO", -5, "WARN",
+        "No C2PA manifest was detected; absence does not imply manipulation.", None,
+    ),
+    ("metadata.consistency", "CONSISTENT"): (
+        "metadata.consistency", "Metadata consistency", "POSITIVE", 6, "OK",
+        "Metadata fields are internally consistent.", None,
+    ),
+    ("metadata.consistency", "INCONSISTENT_OR_MISSING"): (
+        "metadata.consistency", "Metadata inconsistencies or gaps", "MEDIUM", -8, "WARN",
+        "Metadata inconsistencies or missing device identifiers reduce confidence.", None,
+    ),
+    ("ai.disclosure", "POSSIBLE"): (
+        "ai.disclosure", "Possible AI disclosure", "MEDIUM", -10, "WARN",
+        "Metadata includes AI-related markers; this may indicate generated or edited content.", None,
+    ),
+    ("ai.disclosure", "NO"): (
+        "ai.disclosure", "No AI disclosure markers", "INFO", 2, "OK",
+        "No AI markers were found in available metadata.", None,
+    ),
+    ("transform.screenshot", "HIGH"): (
+        "transform.screenshot", "Screenshot likelihood high", "MEDIUM", -8, "WARN",
+        "Signals suggest screen capture or export, which can strip provenance.", None,
+    ),
+    ("transform.screenshot", "LOW"): (
+        "transform.screenshot", "Screenshot likelihood low", "INFO", 3, "OK",
+        "Device metadata suggests native capture rather than screenshot.", None,
+    ),
+    ("transform.reencode", "POSSIBLE"): (
+        "transform.reencode", "Possible re-encoding", "MEDIUM", -6, "WARN",
+        "Container metadata suggests re-encoding or forwarding.", None,
+    ),
+    ("container.anomalies", "ANOMALY"): (
+        "container.anomalies", "Container anomalies", "MEDIUM", -7, "WARN",
+        "Container or stream structure shows anomalies.", None,
+    ),
+    ("container.anomalies", "OK"): (
+        "container.anomalies", "Container structure normal", "INFO", 2, "OK",
+        "No notable container anomalies detected.", None,
+    ),
+    ("container.anomalies", "NOT_AVAILABLE"): (
+        "container.anomalies", "Container checks unavailable", "INFO", 0, "NOT_AVAILABLE",
+        "Container checks unavailable.", "notes",
+    ),
+    ("visual.forensics", "SUSPICIOUS"): (
+        "visual.forensics", "Visual anomaly signals", "HIGH", -18, "WARN",
+        "Visual forensics detected elevated anomaly scores.", None,
+    ),
+    ("visual.forensics", "CLEAR"): (
+        "visual.forensics", "No strong visual anomalies", "INFO", 4, "OK",
+        "Visual forensics did not detect strong anomalies.", None,
+    ),
+    ("visual.forensics", "NOT_AVAILABLE"): (
+        "visual.forensics", "Visual forensics unavailable", "INFO", 0, "NOT_AVAILABLE",
+        "Visual forensics unavailable.", "explanation",
+    ),
+}
+
+_PROVENANCE_FLAGS: Dict[str, Dict[str, bool]] = {
+    "VERIFIED_ORIGINAL": {"present": True, "valid": True},
+    "ALTERED_OR_BROKEN_PROVENANCE": {"present": True, "broken": True},
+}
 
 
 def fuse_signals(
@@ -70,271 +117,101 @@ def fuse_signals(
 ) -> Dict[str, Any]:
     signals: List[Signal] = []
 
-    score = 50.0
     provenance_flags = {
         "present": False,
         "valid": False,
         "broken": False,
         "state": provenance_state,
     }
-
-    if provenance_state == "VERIFIED_ORIGINAL":
-        provenance_flags.update({"present": True, "valid": True})
+    provenance_flags.update(_PROVENANCE_FLAGS.get(provenance_state, {}))
+
+    def apply(rule: Optional[_Rule], value: Any, source: Dict[str, Any], evidence: Any) -> None:
+        if rule is None:
+            return
+        key, label, severity, weight, status, explanation, explanation_field = rule
+        if explanation_field:
+            explanation = source.get(explanation_field) or explanation
         signals.append(
-            _signal(
-                key="provenance.verified",
-                label="Provenance verified",
-                value=provenance_state,
-                severity="POSITIVE",
-                weight=25,
-                evidence=c2pa_summary,
-                explanation="C2PA provenance was present and verified, increasing trust.",
-                status="OK",
-            )
+            {
+                "key": key,
+                "label": label,
+                "value": value,
+                "severity": severity,
+                "weight": weight,
+                "evidence": evidence,
+                "explanation": explanation,
+                "status": status,
+            }
         )
-        score += 25
-    elif provenance_state == "ALTERED_OR_BROKEN_PROVENANCE":
-        provenance_flags.update({"present": True, "broken": True})
-        signals.append(
-            _signal(
-                key="provenance.broken",
-                label="Broken or altered provenance",
-                value=provenance_state,
-                severity="HIGH",
-                weight=-30,
-                evidence=c2pa_summary,
-                explanation="C2PA provenance was present but indicates a broken or altered trust chain.",
-                status="FAIL",
-            )
-        )
-        score -= 30
-    else:
-        signals.append(
-            _signal(
-                key="provenance.absent",
-                label="No cryptographic provenance",
-                value=provenance_state,
-                severity="INFO",
-                weight=-5,
-                evidence=c2pa_summary,
-                explanation="No C2PA manifest was detected; absence does not imply manipulation.",
-                status="WARN",
-            )
-        )
-        score -= 5
 
+    provenance_rule = _RULES.get(("provenance", provenance_state)) or _RULES[("provenance", "*")]
+    apply(provenance_rule, provenance_state, {}, c2pa_summary)
+
+    # Completeness is graded rather than state-based, so it stays outside the table.
     meta_score = metadata_completeness.get("score_0_to_3")
     if meta_score is not None:
         delta = (int(meta_score) - 1) * 4
         signals.append(
-            _signal(
-                key="metadata.completeness",
-                label="Metadata completeness",
-                value=meta_score,
-                severity="INFO",
-                weight=delta,
-                evidence=metadata_completeness,
-                explanation="Metadata completeness influences visibility into capture context.",
-                status="OK" if meta_score >= 2 else "WARN",
-            )
+            {
+                "key": "metadata.completeness",
+                "label": "Metadata completeness",
+                "value": meta_score,
+                "severity": "INFO",
+                "weight": delta,
+                "evidence": metadata_completeness,
+                "explanation": "Metadata completeness influences visibility into capture context.",
+                "status": "OK" if meta_score >= 2 else "WARN",
+            }
         )
-        score += delta
 
     consistency_status = metadata_consistency.get("status")
-    if consistency_status == "CONSISTENT":
-        signals.append(
-            _signal(
-                key="metadata.consistency",
-                label="Metadata consistency",
-                value=consistency_status,
-                severity="POSITIVE",
-                weight=6,
-                evidence=metadata_consistency,
-                explanation="Metadata fields are internally consistent.",
-                status="OK",
-            )
-        )
-        score += 6
-    elif consistency_status == "INCONSISTENT_OR_MISSING":
-        signals.append(
-            _signal(
-                key="metadata.consistency",
-                label="Metadata inconsistencies or gaps",
-                value=consistency_status,
-                severity="MEDIUM",
-                weight=-8,
-                evidence=metadata_consistency,
-                explanation="Metadata inconsistencies or missing device identifiers reduce confidence.",
-                status="WARN",
-            )
-        )
-        score -= 8
+    apply(
+        _RULES.get(("metadata.consistency", consistency_status)),
+        consistency_status,
+        metadata_consistency,
+        metadata_consistency,
+    )
 
     ai_declared = (ai_disclosure or {}).get("declared")
-    if ai_declared == "POSSIBLE":
-        signals.append(
-            _signal(
-                key="ai.disclosure",
-                label="Possible AI disclosure",
-                value=ai_declared,
-                severity="MEDIUM",
-                weight=-10,
-                evidence=ai_disclosure,
-                explanation="Metadata includes AI-related markers; this may indicate generated or edited content.",
-                status="WARN",
-            )
-        )
-        score -= 10
-    elif ai_declared == "NO":
-        signals.append(
-            _signal(
-                key="ai.disclosure",
-                label="No AI disclosure markers",
-                value=ai_declared,
-                severity="INFO",
-                weight=2,
-                evidence=ai_disclosure,
-                explanation="No AI markers were found in available metadata.",
-                status="OK",
-            )
-        )
-        score += 2
+    apply(_RULES.get(("ai.disclosure", ai_declared)), ai_declared, ai_disclosure, ai_disclosure)
 
     if transformation_hints:
-        hints_note = transformation_hints.get("notes") or []
-        if transformation_hints.get("screenshot_likelihood") == "HIGH":
-            signals.append(
-                _signal(
-                    key="transform.screenshot",
-                    label="Screenshot likelihood high",
-                    value=transformation_hints.get("screenshot_likelihood"),
-                    severity="MEDIUM",
-                    weight=-8,
-                    evidence=transformation_hints,
-                    explanation="Signals suggest screen capture or export, which can strip provenance.",
-                    status="WARN",
-                )
-            )
-            score -= 8
-        elif transformation_hints.get("screenshot_likelihood") == "LOW":
-            signals.append(
-                _signal(
-                    key="transform.screenshot",
-                    label="Screenshot likelihood low",
-                    value=transformation_hints.get("screenshot_likelihood"),
-                    severity="INFO",
-                    weight=3,
-                    evidence=transformation_hints,
-                    explanation="Device metadata suggests native capture rather than screenshot.",
-                    status="OK",
-                )
-            )
-            score += 3
-
-        if transformation_hints.get("forwarded_or_reencoded") == "POSSIBLE":
-            signals.append(
-                _signal(
-                    key="transform.reencode",
-                    label="Possible re-encoding",
-                    value=transformation_hints.get("forwarded_or_reencoded"),
-                    severity="MEDIUM",
-                    weight=-6,
-                    evidence=hints_note,
-                    explanation="Container metadata suggests re-encoding or forwarding.",
-                    status="WARN",
-                )
-            )
-            score -= 6
+        screenshot = transformation_hints.get("screenshot_likelihood")
+        apply(
+            _RULES.get(("transform.screenshot", screenshot)),
+            screenshot,
+            transformation_hints,
+            transformation_hints,
+        )
+        reencoded = transformation_hints.get("forwarded_or_reencoded")
+        apply(
+            _RULES.get(("transform.reencode", reencoded)),
+            reencoded,
+            transformation_hints,
+            transformation_hints.get("notes") or [],
+        )
 
     if container_anomalies:
         status = container_anomalies.get("status")
-        if status == "ANOMALY":
-            signals.append(
-                _signal(
-                    key="container.anomalies",
-                    label="Container anomalies",
-                    value=status,
-                    severity="MEDIUM",
-                    weight=-7,
-                    evidence=container_anomalies,
-                    explanation="Container or stream structure shows anomalies.",
-                    status="WARN",
-                )
-            )
-            score -= 7
-        elif status == "OK":
-            signals.append(
-                _signal(
-                    key="container.anomalies",
-                    label="Container structure normal",
-                    value=status,
-                    severity="INFO",
-                    weight=2,
-                    evidence=container_anomalies,
-                    explanation="No notable container anomalies detected.",
-                    status="OK",
-                )
-            )
-            score += 2
-        elif status == "NOT_AVAILABLE":
-            signals.append(
-                _signal(
-                    key="container.anomalies",
-                    label="Container checks unavailable",
-                    value=status,
-                    severity="INFO",
-                    weight=0,
-                    evidence=container_anomalies,
-                    explanation=container_anomalies.get("notes") or "Container checks unavailable.",
-                    status="NOT_AVAILABLE",
-                )
-            )
+        apply(
+            _RULES.get(("container.anomalies", status)),
+            status,
+            container_anomalies,
+            container_anomalies,
+        )
 
     if visual_forensics:
         v_status = visual_forensics.get("status")
-        if v_status == "SUSPICIOUS":
-            signals.append(
-                _signal(
-                    key="visual.forensics",
-                    label="Visual anomaly signals",
-                    value=v_status,
-                    severity="HIGH",
-                    weight=-18,
-                    evidence=visual_forensics,
-                    explanation="Visual forensics detected elevated anomaly scores.",
-                    status="WARN",
-                )
-            )
-            score -= 18
-        elif v_status == "CLEAR":
-            signals.append(
-                _signal(
-                    key="visual.forensics",
-                    label="No strong visual anomalies",
-                    value=v_status,
-                    severity="INFO",
-                    weight=4,
-                    evidence=visual_forensics,
-                    explanation="Visual forensics did not detect strong anomalies.",
-                    status="OK",
-                )
-            )
-            score += 4
-        elif v_status == "NOT_AVAILABLE":
-            signals.append(
-                _signal(
-                    key="visual.forensics",
-                    label="Visual forensics unavailable",
-                    value=v_status,
-                    severity="INFO",
-                    weight=0,
-                    evidence=visual_forensics,
-                    explanation=visual_forensics.get("explanation") or "Visual forensics unavailable.",
-                    status="NOT_AVAILABLE",
-                )
-            )
+        apply(
+            _RULES.get(("visual.forensics", v_status)),
+            v_status,
+            visual_forensics,
+            visual_forensics,
+        )
 
-    trust_score = _clamp(score)
+    # The score is a plain weighted sum: every emitted signal contributes its weight once.
+    score = _BASE_SCORE + sum(s["weight"] for s in signals)
+    trust_score = max(0, min(100, int(round(score))))
     label = _label_for_score(trust_score)
     top_reasons = _top_reasons(signals)
 
@@ -344,4 +221,4 @@ def fuse_signals(
         "top_reasons": top_reasons,
         "signals": signals,
         "provenance_flags": provenance_flags,
-    }
\ No newline at end of file
+    }
@@ -1,31 +1,61 @@
 from __future__ import annotations
+import asyncio
+import contextlib
+import functools
+import hashlib
+import itertools
 import os
+import pathlib
 import secrets
 import time
 import requests
 import json
-from datetime import datetime, timezone, timedelta
-from typing import Optional, List, Dict, Any
+from datetime import datetime, timezone
+from typing import Annotated, Optional, List, Dict, Any
 import tempfile
 import base64
+import anyio
 from fastapi import FastAPI, Depends, HTTPException, Request, UploadFile, File, Header, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, ConfigDict, EmailStr, StringConstraints
 from backend import db, config
-from backend.pipeline import analyze_media_file
 from backend.forensics import ARTIFACT_DIR
-from backend.utils import sha256_file
 import jwt
+import orjson
+from cachetools import LRUCache, TLRUCache, TTLCache
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse, FileResponse, Response
+from fastapi.responses import JSONResponse, FileResponse, ORJSONResponse, Response
+from starlette.background import BackgroundTask
 from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.types import ASGIApp
-from backend.report import build_pdf_report
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 ADMIN_HEADER = "x-admin-key"
 
+
+# The analysis pipeline and ReportLab are imported on first use, so workers start
+# (and answer /health) without paying for them. These wrappers run inside the
+# worker thread, so that first import does not block the event loop either.
+def _analyze_media_file(path: str, filename: str, **kwargs: Any) -> Dict[str, Any]:
+    from backend.pipeline import analyze_media_file
+
+    return analyze_media_file(path, filename, **kwargs)
+
+
+def _build_pdf_report(result: Any, out_path: str) -> None:
+    from backend.report import build_pdf_report
+
+    build_pdf_report(result, out_path)
+
+
+# Resolved once; artifact paths must resolve to somewhere under this root.
+ARTIFACT_ROOT = pathlib.Path(ARTIFACT_DIR).resolve()
+# Artifacts never change once written, so browsers may reuse them for a while.
+ARTIFACT_CACHE_CONTROL = "private, max-age=3600"
+
 JWT_SECRET = config.JWT_SECRET
 JWT_ALG = config.JWT_ALG
 JWT_EXPIRE_HOURS = config.JWT_EXPIRE_HOURS
@@ -45,16 +75,99 @@ def _ensure_dict(value: Any) -> Dict[str, Any]:
             return {}
     return {}
 
+def _image_media_type(path: str | None, data: bytes | None = None) -> str:
+    # Video frame heatmaps are written as JPEG; image heatmaps stay PNG.
+    if (path and path.lower().endswith((".jpg", ".jpeg"))) or (data and data[:3] == b"\xff\xd8\xff"):
+        return "image/jpeg"
+    return "image/png"
+
+UPLOAD_CHUNK_BYTES = 1 << 20
+
+
+async def _spool_upload(file: UploadFile, tmp) -> tuple[str, int]:
+    # Copy the upload in 1 MiB chunks so memory stays flat for large videos; the
+    # blocking disk writes run in a worker thread instead of on the event loop.
+    # The SHA-256 and size are computed on the way through (returns hexdigest, bytes).
+    hasher = hashlib.sha256()
+    bytes_written = 0
+    while True:
+        chunk = await file.read(UPLOAD_CHUNK_BYTES)
+        if not chunk:
+            break
+        hasher.update(chunk)
+        bytes_written += len(chunk)
+        await anyio.to_thread.run_sync(tmp.write, chunk)
+    return hasher.hexdigest(), bytes_written
+
+
+def _remove_file(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+@contextlib.contextmanager
+def _temp_upload_path(suffix: str):
+    # Engine functions expect a filesystem path; the file is removed on exit.
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    os.close(fd)
+    try:
+        yield path
+    finally:
+        _remove_file(path)
+
+
 def make_token(user_id: str) -> str:
-    now = datetime.now(timezone.utc)
+    iat = int(time.time())
     payload = {
         "sub": user_id,
-        "iat": int(now.timestamp()),
-        "exp": int((now + timedelta(hours=JWT_EXPIRE_HOURS)).timestamp()),
+        "iat": iat,
+        "exp": iat + JWT_EXPIRE_HOURS * 3600,
     }
     return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALG)
 
 
+# Decoded payloads of verified tokens, so repeat requests skip the HMAC check.
+# Entries expire at the token's own `exp` (wall clock), capped at one hour.
+# Failures are never cached; they raise from jwt.decode on every attempt.
+_TOKEN_CACHE_MAX_TTL_S = 3600
+
+
+def _token_expires_at(_key: bytes, payload: Dict[str, Any], now: float) -> float:
+    cap = now + _TOKEN_CACHE_MAX_TTL_S
+    exp = payload.get("exp")
+    return min(float(exp), cap) if isinstance(exp, (int, float)) else cap
+
+
+_token_cache: TLRUCache = TLRUCache(maxsize=4096, ttu=_token_expires_at, timer=time.time)
+
+
+async def _decode_token(token: str) -> Dict[str, Any]:
+    key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+    payload = _token_cache.get(key)
+    if payload is None:
+        decode = functools.partial(jwt.decode, token, JWT_SECRET, algorithms=[JWT_ALG])
+        # HMAC verification takes microseconds, less than a thread hop; asymmetric
+        # algorithms (RS*/ES*/PS*) are slow enough to verify in a worker thread.
+        if JWT_ALG.startswith("HS"):
+            payload = decode()
+        else:
+            payload = await anyio.to_thread.run_sync(decode)
+        _token_cache[key] = payload
+    return payload
+
+
+# Short-lived user rows for require_user, keyed by str(user id). Local writes that
+# change flags or passwords drop the entry via _forget_user; other instances may
+# serve the old row for up to the TTL.
+_USER_CACHE: TTLCache = TTLCache(maxsize=2048, ttl=30)
+
+
+def _forget_user(user_id: Any) -> None:
+    _USER_CACHE.pop(str(user_id), None)
+
+
 async def require_user(
     pool,
     creds: HTTPAuthorizationCredentials | None = Depends(bearer),
@@ -63,7 +176,7 @@ async def require_user(
         raise HTTPException(status_code=401, detail="Missing token")
 
     try:
-        payload = jwt.decode(creds.credentials, JWT_SECRET, algorithms=[JWT_ALG])
+        payload = await _decode_token(creds.credentials)
         user_id = payload.get("sub")
         if not user_id:
             raise HTTPException(status_code=401, detail="Invalid token")
@@ -72,9 +185,12 @@ async def require_user(
     except Exception:
         raise HTTPException(status_code=401, detail="Invalid token")
 
-    user = await db.get_user_by_id(pool, user_id)
-    if not user:
-        raise HTTPException(status_code=401, detail="User not found")
+    user = _USER_CACHE.get(user_id)
+    if user is None:
+        user = await db.get_user_by_id(pool, user_id)
+        if not user:
+            raise HTTPException(status_code=401, detail="User not found")
+        _USER_CACHE[user_id] = user
 
     if not user.get("is_active", True):
         raise HTTPException(status_code=403, detail="User disabled")
@@ -96,44 +212,64 @@ def require_admin(request: Request) -> None:
         raise HTTPException(status_code=401, detail="Unauthorized")
 
 
-class EnableByEmail(BaseModel):
+# Length caps let validation reject oversized fields before anything else runs.
+ShortStr = Annotated[str, StringConstraints(max_length=256)]
+LongStr = Annotated[str, StringConstraints(max_length=5000)]
+PasswordStr = Annotated[str, StringConstraints(max_length=1024)]
+
+
+class _RequestModel(BaseModel):
+    # Request bodies are read-only once parsed; unknown fields are dropped.
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
+
+class EnableByEmail(_RequestModel):
     email: EmailStr
     is_active: Optional[bool] = None
     is_approved: Optional[bool] = None
 
 
-class SendTempPasswordReq(BaseModel):
+class SendTempPasswordReq(_RequestModel):
     email: EmailStr
 
-class RegisterReq(BaseModel):
-    name: str
+class RegisterReq(_RequestModel):
+    name: ShortStr
     email: EmailStr
-    phone: Optional[str] = None
-    occupation: Optional[str] = None
-    company: Optional[str] = None
-    use_case: Optional[str] = None
-    role: Optional[str] = None
-    notes: Optional[str] = None
+    phone: Optional[ShortStr] = None
+    occupation: Optional[ShortStr] = None
+    company: Optional[ShortStr] = None
+    use_case: Optional[LongStr] = None
+    role: Optional[ShortStr] = None
+    notes: Optional[LongStr] = None
 
 
-class LoginReq(BaseModel):
+class LoginReq(_RequestModel):
     email: EmailStr
-    password: str
+    password: PasswordStr
+
+
+class ChangePasswordReq(_RequestModel):
+    old_password: Optional[PasswordStr] = None
+    new_password: PasswordStr
 
+class CreateCaseReq(_RequestModel):
+    title: ShortStr
+    description: Optional[LongStr] = None
 
-class ChangePasswordReq(BaseModel):
-    old_password: Optional[str] = None
-    new_password: str
+class ReportReq(_RequestModel):
+    case_id: ShortStr
 
-class CreateCaseReq(BaseModel):
-    title: str
-    description: Optional[str] = None
 
-class ReportReq(BaseModel):
-    case_id: str
+class AnalysisJSONResponse(ORJSONResponse):
+    # FastAPI's ORJSONResponse, plus naive datetimes serialized as UTC (DB rows).
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_NAIVE_UTC | orjson.OPT_SERIALIZE_NUMPY,
+        )
 
 
-app = FastAPI(title="TruthSig API", version="1.0.0")
+app = FastAPI(title="TruthSig API", version="1.0.0", default_response_class=AnalysisJSONResponse)
 
 
 class SecurityHeadersMiddleware(BaseHTTPMiddleware):
@@ -154,20 +290,49 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
         return response
 
 
-class RequestIdMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        request_id = request.headers.get("X-Request-ID") or secrets.token_hex(12)
-        response: Response = await call_next(request)
-        response.headers.setdefault("X-Request-ID", request_id)
-        return response
+class RequestIdMiddleware:
+    # Plain ASGI (no BaseHTTPMiddleware request/response wrapping). Generated ids are
+    # a random per-process prefix plus a counter: unique without a urandom call each.
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self._prefix = secrets.token_hex(6)
+        self._counter = itertools.count(1)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = Headers(scope=scope).get("x-request-id") or f"{self._prefix}-{next(self._counter):x}"
+
+        async def send_with_request_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).setdefault("X-Request-ID", request_id)
+            await send(message)
+
+        await self.app(scope, receive, send_with_request_id)
 
 
+class JSONGZipMiddleware(GZipMiddleware):
+    # Artifact images and report PDFs are already compressed; everything else
+    # here is JSON, which shrinks several-fold.
+    SKIP_PATH_SUFFIXES = ("/artifact", "/report")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and scope["path"].endswith(self.SKIP_PATH_SUFFIXES):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
 
 # CORS
 
 origins = config.CORS_ORIGINS
 allow_credentials = False  # because we are not using cookies
 
+# Innermost, so the headers added by the middlewares below land on the compressed response
+app.add_middleware(JSONGZipMiddleware, minimum_size=1024, compresslevel=5)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
@@ -180,15 +345,91 @@ app.add_middleware(TrustedHostMiddleware, allowed_hosts=config.TRUSTED_HOSTS)
 app.add_middleware(SecurityHeadersMiddleware, env=config.TRUTHSIG_ENV)
 app.add_middleware(RequestIdMiddleware)
 
+# Audit events are fire-and-forget: handlers enqueue them and background consumers
+# write them in batches (up to EVENT_BATCH_MAX rows, or whatever arrived within
+# EVENT_BATCH_WAIT_S of the first one). A batch the database rejects is retried one
+# row at a time, so one bad row (or a blip) doesn't take custody events with it.
+# Reads that depend on recent events (the case event list and the report's chain of
+# custody) call _flush_events first. The queue is per process: an event queued by
+# another worker can still be in flight for up to EVENT_BATCH_WAIT_S plus its insert,
+# and a flush that times out under load proceeds with what is already written.
+EVENT_QUEUE_MAX = 10_000
+EVENT_BATCH_MAX = 100
+EVENT_BATCH_WAIT_S = 0.05
+EVENT_CONSUMERS = 2
+EVENT_FLUSH_TIMEOUT_S = 2.0
+
+
+async def _event_consumer(pool, queue: asyncio.Queue) -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await queue.get()]
+        deadline = loop.time() + EVENT_BATCH_WAIT_S
+        while len(batch) < EVENT_BATCH_MAX:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        try:
+            await db.insert_events(pool, batch)
+        except Exception as e:
+            print("EVENT BATCH INSERT ERROR, retrying per row:", repr(e))
+            for event in batch:
+                try:
+                    await db.insert_event(pool, **event)
+                except Exception as row_error:
+                    print("EVENT INSERT ERROR:", event.get("event_type"), event.get("evidence_id"), repr(row_error))
+        finally:
+            for _ in batch:
+                queue.task_done()
+
+
+async def _record_event(pool, **event: Any) -> None:
+    """Queues an audit event (same keywords as db.insert_event); writes it inline if no queue is running or it is full."""
+    queue: asyncio.Queue | None = getattr(app.state, "event_queue", None)
+    if queue is not None:
+        try:
+            queue.put_nowait(event)
+            return
+        except asyncio.QueueFull:
+            pass
+    await db.insert_event(pool, **event)
+
+
+async def _flush_events(timeout: float = EVENT_FLUSH_TIMEOUT_S) -> None:
+    """Waits (up to `timeout`) until every event queued so far in this process has been written."""
+    queue: asyncio.Queue | None = getattr(app.state, "event_queue", None)
+    if queue is None:
+        return
+    try:
+        await asyncio.wait_for(queue.join(), timeout=timeout)
+    except asyncio.TimeoutError:
+        pass
+
+
 @app.on_event("startup")
 async def _startup():
     config.validate_production_settings()
     app.state.pool = await db.create_pool()
     await db.init_db(app.state.pool)
+    app.state.event_queue = asyncio.Queue(maxsize=EVENT_QUEUE_MAX)
+    app.state.event_consumers = [
+        asyncio.create_task(_event_consumer(app.state.pool, app.state.event_queue))
+        for _ in range(EVENT_CONSUMERS)
+    ]
 
 
 @app.on_event("shutdown")
 async def _shutdown():
+    if getattr(app.state, "event_queue", None) is not None:
+        # Flush pending events before the pool goes away
+        await _flush_events(timeout=10)
+        app.state.event_queue = None
+    for task in getattr(app.state, "event_consumers", []):
+        task.cancel()
     pool = getattr(app.state, "pool", None)
     if pool:
         await pool.close()
@@ -254,6 +495,7 @@ async def admin_enable_user_by_email(
     if req.is_approved is not None:
         await db.set_user_approved(pool, user["id"], bool(req.is_approved))
 
+    _forget_user(user["id"])
     return {"ok": True}
 
 
@@ -278,6 +520,7 @@ async def admin_send_temp_password(
 
     temp_password = db.generate_temp_password()
     await db.set_user_temp_password(pool, user_id=user["id"], temp_password=temp_password)
+    _forget_user(user["id"])
 
     # Try email (optional)
     sent, err = db.try_send_email(
@@ -310,16 +553,27 @@ async def admin_send_temp_password(
     "email_error": err,}
 
 
+REPORT_422_HINT = (
+    "POST /report expects JSON like {'case_id': '...'}; upload files to "
+    "POST /cases/{case_id}/evidence as multipart/form-data with field name 'file'."
+)
+
+
 @app.exception_handler(RequestValidationError)
 async def request_validation_exception_handler(request: Request, exc: RequestValidationError):
     # FastAPI's default handler can crash if `exc.errors()` contains raw bytes (e.g., multipart body)
-    safe_errors = []
-    for e in exc.errors():
-        e2 = dict(e)
-        # "input" can be bytes when body isn't JSON; make it JSON-safe
-        if isinstance(e2.get("input"), (bytes, bytearray)):
-            e2["input"] = "<binary body omitted>"
-        safe_errors.append(e2)
+    errors = exc.errors()
+    if any(isinstance(e.get("input"), (bytes, bytearray)) for e in errors):
+        safe_errors = []
+        for e in errors:
+            e2 = dict(e)
+            # "input" can be bytes when body isn't JSON; make it JSON-safe
+            if isinstance(e2.get("input"), (bytes, bytearray)):
+                e2["input"] = "<binary body omitted>"
+            safe_errors.append(e2)
+    else:
+        # Common case (missing/invalid fields): nothing to sanitize, no copies
+        safe_errors = errors
 
     # Optional: give a helpful hint when someone uploads a file to /report
     if request.url.path == "/report":
@@ -327,7 +581,7 @@ async def request_validation_exception_handler(request: Request, exc: RequestVal
             status_code=422,
             content={
                 "detail": safe_errors,
-                "hint": "POST /report expects JSON like {'case_id': '...'}; upload files to POST /cases/{case_id}/evidence as multipart/form-data with field name 'file'."
+                "hint": REPORT_422_HINT,
             },
         )
 
@@ -347,18 +601,24 @@ async def analyze(request: Request, file: UploadFile = File(...), pool=Depends(g
         _, ext = os.path.splitext(file.filename)
         suffix = ext or ""
 
-    tmp_path = None
     start = time.monotonic()
-    try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-            tmp_path = tmp.name
-            content = await file.read()
-            tmp.write(content)
-
-        analysis = analyze_media_file(tmp_path, file.filename or "upload")
+    with _temp_upload_path(suffix) as tmp_path:
+        with open(tmp_path, "wb") as tmp:
+            upload_sha256, upload_bytes = await _spool_upload(file, tmp)
+
+        # Forensics/hashing/tool calls are blocking; keep them off the event loop.
+        analysis = await anyio.to_thread.run_sync(
+            functools.partial(
+                _analyze_media_file,
+                tmp_path,
+                file.filename or "upload",
+                sha256=upload_sha256,
+                size_bytes=upload_bytes,
+            )
+        )
 
         latency_ms = int((time.monotonic() - start) * 1000)
-        await db.insert_event(
+        await _record_event(
             pool,
             case_id=None,
             evidence_id=None,
@@ -396,16 +656,13 @@ async def analyze(request: Request, file: UploadFile = File(...), pool=Depends(g
             "forensics": analysis.get("forensics"),
             "timeline": analysis.get("derived_timeline"),
             "signals": analysis.get("signals"),
-            "raw_extracts": analysis.get("raw_extracts"),
+            "raw_extracts": {
+                "metadata": analysis.get("metadata"),
+                "ffprobe": analysis.get("ffprobe"),
+                "c2pa": analysis.get("c2pa"),
+            },
         }
 
-    finally:
-        if tmp_path and os.path.exists(tmp_path):
-            try:
-                os.remove(tmp_path)
-            except Exception:
-                pass
-            
 
 @app.post("/auth/register")
 async def auth_register(req: RegisterReq, pool=Depends(get_pool)):
@@ -434,6 +691,18 @@ async def auth_register(req: RegisterReq, pool=Depends(get_pool)):
     return {"ok": True}
 
 
+def _user_public(user: Dict[str, Any]) -> Dict[str, Any]:
+    # asyncpg already returns Python bools for boolean columns; `or False` only covers NULLs
+    return {
+        "id": str(user["id"]),
+        "email": user["email"],
+        "name": user.get("name"),
+        "must_change_password": user.get("must_change_password") or False,
+        "is_approved": user.get("is_approved") or False,
+        "is_active": user.get("is_active") or False,
+    }
+
+
 @app.post("/auth/login")
 async def auth_login(req: LoginReq, pool=Depends(get_pool)):
     user = await db.get_user_by_email(pool, req.email)
@@ -453,28 +722,14 @@ async def auth_login(req: LoginReq, pool=Depends(get_pool)):
     # match frontend expectation: {token, user}
     return {
         "token": token,
-        "user": {
-            "id": str(user["id"]),
-            "email": user["email"],
-            "name": user.get("name"),
-            "must_change_password": bool(user.get("must_change_password")),
-            "is_approved": bool(user.get("is_approved")),
-            "is_active": bool(user.get("is_active")),
-        },
+        "user": _user_public(user),
     }
 
 
 @app.get("/auth/me")
 async def auth_me(pool=Depends(get_pool), creds: HTTPAuthorizationCredentials | None = Depends(bearer)):
     user = await require_user(pool, creds)
-    return {
-        "id": str(user["id"]),
-        "email": user["email"],
-        "name": user.get("name"),
-        "must_change_password": bool(user.get("must_change_password")),
-        "is_approved": bool(user.get("is_approved")),
-        "is_active": bool(user.get("is_active")),
-    }
+    return _user_public(user)
 
 @app.post("/auth/change-password")
 async def auth_change_password(
@@ -492,6 +747,7 @@ async def auth_change_password(
             raise HTTPException(status_code=401, detail="Invalid credentials")
 
     await db.set_user_password(pool, str(user["id"]), req.new_password)
+    _forget_user(user["id"])
     return {"ok": True}
 
 
@@ -556,9 +812,9 @@ async def upload_case_evidence(
 ):
     user = await require_user(pool, creds)
 
-    c = await db.get_case(pool, case_id=case_id, user_id=str(user["id"]))
-    if not c:
-        raise HTTPException(status_code=404, detail="Case not found")
+    # The case lookup runs while the upload is copied to disk; it is awaited
+    # before any analysis starts, so an unknown case still never gets scanned.
+    case_task = asyncio.ensure_future(db.get_case(pool, case_id=case_id, user_id=str(user["id"])))
 
     # Save upload to temp file
     suffix = ""
@@ -566,18 +822,30 @@ async def upload_case_evidence(
         _, ext = os.path.splitext(file.filename)
         suffix = ext or ""
 
-    tmp_path = None
     start = time.monotonic()
-    try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-            tmp_path = tmp.name
-            content = await file.read()
-            tmp.write(content)
-
-        
-        analysis_json = analyze_media_file(tmp_path, file.filename or "upload")
-        bytes_ = analysis_json.get("bytes") or os.path.getsize(tmp_path)
-        sha256 = analysis_json.get("sha256") or sha256_file(tmp_path)
+    with _temp_upload_path(suffix) as tmp_path:
+        try:
+            with open(tmp_path, "wb") as tmp:
+                upload_sha256, upload_bytes = await _spool_upload(file, tmp)
+        except BaseException:
+            case_task.cancel()
+            raise
+
+        c = await case_task
+        if not c:
+            raise HTTPException(status_code=404, detail="Case not found")
+
+        analysis_json = await anyio.to_thread.run_sync(
+            functools.partial(
+                _analyze_media_file,
+                tmp_path,
+                file.filename or "upload",
+                sha256=upload_sha256,
+                size_bytes=upload_bytes,
+            )
+        )
+        bytes_ = analysis_json.get("bytes") or upload_bytes
+        sha256 = analysis_json.get("sha256") or upload_sha256
         media_type = analysis_json.get("media_type") or "unknown"
         provenance_state = analysis_json.get("provenance_state") or "UNKNOWN"
         summary = analysis_json.get("one_line_rationale") or analysis_json.get("summary") or ""
@@ -595,7 +863,7 @@ async def upload_case_evidence(
         )
 
         latency_ms = int((time.monotonic() - start) * 1000)
-        await db.insert_event(
+        await _record_event(
             pool,
             case_id=case_id,
             evidence_id=str(row["id"]),
@@ -612,13 +880,6 @@ async def upload_case_evidence(
 
         return row
 
-    finally:
-        if tmp_path and os.path.exists(tmp_path):
-            try:
-                os.remove(tmp_path)
-            except Exception:
-                pass
-
 
 @app.get("/cases/{case_id}/evidence/{evidence_id}")
 async def get_evidence(
@@ -649,11 +910,30 @@ async def get_case_events(
     if not c:
         raise HTTPException(status_code=404, detail="Case not found")
 
+    await _flush_events()
     return await db.list_case_events(pool, case_id=case_id, limit=limit)
 
 
+# ETags of artifact files by resolved path. Artifacts are written once and never
+# rewritten, so a matching If-None-Match can be answered without touching the disk.
+_ARTIFACT_ETAGS: LRUCache = LRUCache(maxsize=4096)
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = {c.strip().removeprefix("W/") for c in header.split(",")}
+    return etag in candidates or "*" in candidates
+
+
+def _not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": ARTIFACT_CACHE_CONTROL})
+
+
 @app.get("/cases/{case_id}/evidence/{evidence_id}/artifact")
 async def get_evidence_artifact(
+    request: Request,
     case_id: str,
     evidence_id: str,
     kind: str,
@@ -720,21 +1000,48 @@ async def get_evidence_artifact(
 
     # If we have a path, enforce safe root checks before serving
     if path:
-        safe_root = os.path.abspath(ARTIFACT_DIR)
-        abs_path = os.path.abspath(path)
+        abs_path = pathlib.Path(path).resolve()
 
         # Prevent path traversal / serving arbitrary files
-        if os.path.commonpath([safe_root, abs_path]) != safe_root:
+        try:
+            abs_path.relative_to(ARTIFACT_ROOT)
+        except ValueError:
             raise HTTPException(status_code=400, detail="Invalid artifact path")
 
-        if os.path.exists(abs_path):
-            return FileResponse(abs_path, media_type="image/png")
+        cache_key = str(abs_path)
+        etag = _ARTIFACT_ETAGS.get(cache_key)
+        if etag and _etag_matches(request, etag):
+            return _not_modified(etag)
+
+        try:
+            st = os.stat(abs_path)
+        except OSError:
+            st = None
+        if st is not None:
+            etag = '"' + hashlib.blake2b(f"{st.st_mtime_ns}-{st.st_size}".encode(), digest_size=16).hexdigest() + '"'
+            _ARTIFACT_ETAGS[cache_key] = etag
+            if _etag_matches(request, etag):
+                return _not_modified(etag)
+            # Passing stat_result spares FileResponse its own stat call
+            return FileResponse(
+                abs_path,
+                media_type=_image_media_type(cache_key),
+                stat_result=st,
+                headers={"Cache-Control": ARTIFACT_CACHE_CONTROL, "ETag": etag},
+            )
 
     # Fallback: serve from base64 if file is missing (common on Render with multiple instances)
     if artifact_b64:
+        etag = '"' + hashlib.blake2b(artifact_b64.encode(), digest_size=16).hexdigest() + '"'
+        if _etag_matches(request, etag):
+            return _not_modified(etag)
         try:
             data = base64.b64decode(artifact_b64)
-            return Response(content=data, media_type="image/png")
+            return Response(
+                content=data,
+                media_type=_image_media_type(None, data),
+                headers={"Cache-Control": ARTIFACT_CACHE_CONTROL, "ETag": etag},
+            )
         except Exception:
             pass
 
@@ -758,34 +1065,42 @@ async def generate_evidence_report(
     if not evidence:
         raise HTTPException(status_code=404, detail="Evidence not found")
 
+    # the upload's SCAN_CREATED may still be queued
+    await _flush_events()
     events = await db.list_evidence_events(pool, evidence_id, limit=30)
     analysis = _ensure_dict(evidence.get("analysis_json"))
     analysis["report_integrity"] = {
-        "timestamp": datetime.utcnow().strftime("%Y-%m-%d %H:%M UTC"),
+        "timestamp": now_utc().strftime("%Y-%m-%d %H:%M UTC"),
     }
     analysis["chain_of_custody"] = events
 
     with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
         pdf_path = tmp.name
 
-    build_pdf_report(analysis, pdf_path)
+    try:
+        await anyio.to_thread.run_sync(_build_pdf_report, analysis, pdf_path)
 
-    latency_ms = int((time.monotonic() - start) * 1000)
-    await db.insert_event(
-        pool,
-        case_id=case_id,
-        evidence_id=evidence_id,
-        event_type="PDF_EXPORTED",
-        actor=str(user["id"]),
-        ip=request.client.host if request.client else None,
-        user_agent=request.headers.get("user-agent"),
-        details={"latency_ms": latency_ms},
-    )
+        latency_ms = int((time.monotonic() - start) * 1000)
+        await _record_event(
+            pool,
+            case_id=case_id,
+            evidence_id=evidence_id,
+            event_type="PDF_EXPORTED",
+            actor=str(user["id"]),
+            ip=request.client.host if request.client else None,
+            user_agent=request.headers.get("user-agent"),
+            details={"latency_ms": latency_ms},
+        )
+    except Exception:
+        _remove_file(pdf_path)
+        raise
 
+    # The temp PDF is deleted once the response has been sent
     return FileResponse(
         pdf_path,
         media_type="application/pdf",
         filename=f"TruthSig-evidence-{evidence_id}.pdf",
+        background=BackgroundTask(_remove_file, pdf_path),
     )
 
 
@@ -811,13 +1126,26 @@ async def share_evidence(
     return {"token": link["token"], "public_url": public_url}
 
 
+# Sanitized public payloads by evidence id. Evidence rows are never updated after
+# insert, so entries stay valid; the link itself is still checked on every request.
+_PUBLIC_EVIDENCE_CACHE: LRUCache = LRUCache(maxsize=1024)
+_PUBLIC_RESULT_OMIT_KEYS = frozenset(
+    {"heatmap_path", "thumbnail_path", "frame_thumbnails", "flagged_frames", "timeline_markers"}
+)
+
+
 @app.get("/public/evidence/{token}")
 async def public_evidence(token: str, pool=Depends(get_pool)):
     link = await db.get_public_link(pool, token)
     if not link or link.get("revoked_at"):
         raise HTTPException(status_code=404, detail="Link not found")
 
-    evidence = await db.get_evidence_by_id(pool, evidence_id=str(link["evidence_id"]))
+    evidence_id = str(link["evidence_id"])
+    cached = _PUBLIC_EVIDENCE_CACHE.get(evidence_id)
+    if cached is not None:
+        return cached
+
+    evidence = await db.get_evidence_by_id(pool, evidence_id=evidence_id)
     if not evidence:
         raise HTTPException(status_code=404, detail="Evidence not found")
 
@@ -830,11 +1158,11 @@ async def public_evidence(token: str, pool=Depends(get_pool)):
             sanitized = {
                 k: v
                 for k, v in results.items()
-                if k not in {"heatmap_path", "thumbnail_path", "frame_thumbnails", "flagged_frames", "timeline_markers"}
+                if k not in _PUBLIC_RESULT_OMIT_KEYS
             }
             public_forensics["results"] = sanitized
 
-    return {
+    payload = {
         "evidence_id": str(evidence.get("id")),
         "filename": evidence.get("filename"),
         "created_at": evidence.get("created_at"),
@@ -852,6 +1180,8 @@ async def public_evidence(token: str, pool=Depends(get_pool)):
         "timeline": analysis.get("derived_timeline"),
         "signals": analysis.get("signals"),
     }
+    _PUBLIC_EVIDENCE_CACHE[evidence_id] = payload
+    return payload
 
 @app.post("/report")
 async def generate_report(
@@ -869,6 +1199,7 @@ async def generate_report(
 
     # Build structured result for PDF
     result = {
+        "case_id": req.case_id,
         "filename": c.get("title"),
         "media_type": "case",
         "sha256": "",
@@ -883,7 +1214,7 @@ async def generate_report(
             "purpose": "Legal and forensic documentation of digital evidence."
         },
         "report_integrity": {
-            "timestamp": datetime.utcnow().strftime("%Y-%m-%d %H:%M UTC")
+            "timestamp": now_utc().strftime("%Y-%m-%d %H:%M UTC")
         },
     }
 
@@ -895,13 +1226,18 @@ async def generate_report(
         pdf_path = tmp.name
 
     # Generate PDF using your ReportLab logic
-    build_pdf_report(result, pdf_path)
+    try:
+        await anyio.to_thread.run_sync(_build_pdf_report, result, pdf_path)
+    except Exception:
+        _remove_file(pdf_path)
+        raise
 
-    # Return the PDF file
+    # Return the PDF file (deleted once the response has been sent)
     return FileResponse(
         pdf_path,
         media_type="application/pdf",
         filename=f"TruthSig-report-{req.case_id}.pdf",
+        background=BackgroundTask(_remove_file, pdf_path),
     )
     
 
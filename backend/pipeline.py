@@ -1,10 +1,17 @@
+import multiprocessing
 import os
-from typing import Any, Dict, Tuple
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from cachetools import LRUCache
 
 from backend import engine
+from backend import extract_cache
 from backend import fusion
 from backend import forensics
-from backend.utils import sha256_file
+from backend.utils import sha256_file_and_size
 
 
 def _summarize_c2pa(c2pa: Dict[str, Any]) -> Dict[str, Any]:
@@ -19,13 +26,7 @@ def _summarize_c2pa(c2pa: Dict[str, Any]) -> Dict[str, Any]:
             "status": status,
         }
 
-    raw = str(c2pa).lower()
-    present = "manifest" in raw or "c2pa" in raw
-    validation = "UNKNOWN"
-    if "valid" in raw or "verified" in raw or "passed" in raw:
-        validation = "VALID"
-    if "invalid" in raw or "failed" in raw or "broken" in raw:
-        validation = "FAILED"
+    present, validation = engine.c2pa_validation(c2pa)
 
     return {
         "present": present,
@@ -46,8 +47,9 @@ def _container_anomalies(ffprobe: Dict[str, Any]) -> Dict[str, Any]:
     notes = []
     anomalies = []
     streams = ffprobe.get("streams") or []
-    video_streams = [s for s in streams if s.get("codec_type") == "video"]
-    if len(video_streams) > 1:
+    # only "more than one" matters, so stop counting at the second video stream
+    video_count = sum(1 for _ in islice((s for s in streams if s.get("codec_type") == "video"), 2))
+    if video_count > 1:
         anomalies.append("Multiple video streams detected.")
     if not ffprobe.get("format", {}).get("duration"):
         anomalies.append("Missing container duration metadata.")
@@ -60,24 +62,85 @@ def _container_anomalies(ffprobe: Dict[str, Any]) -> Dict[str, Any]:
     return {"status": status, "notes": notes, "anomalies": anomalies}
 
 
+# Derived blocks that depend only on the file bytes (sha256), how they were
+# extracted (media type, tool versions) and nothing path-specific. derived_timeline
+# and ai_disclosure read File:* fields (name, directory, filesystem times) that
+# differ per copy, so they are recomputed each time. Cached values are shared:
+# treat them as read-only.
+_DERIVED_CACHE: LRUCache = LRUCache(maxsize=1024)
+_DERIVED_CACHE_LOCK = threading.Lock()
+
+
+def _derived_metadata(
+    sha256: str,
+    media_type: str,
+    tools: Dict[str, Any],
+    metadata: Dict[str, Any],
+    ffprobe: Dict[str, Any],
+    c2pa: Dict[str, Any],
+) -> Tuple[Tuple[str, str], Dict[str, Any], Dict[str, Any], Dict[str, Any]]:
+    key = (sha256, media_type, tuple((t, (info or {}).get("version")) for t, info in sorted(tools.items())))
+    with _DERIVED_CACHE_LOCK:
+        hit = _DERIVED_CACHE.get(key)
+    if hit is not None:
+        return hit
+
+    derived = (
+        engine.classify_provenance(c2pa, metadata),
+        engine.transformation_hints(metadata, ffprobe),
+        engine.metadata_consistency(metadata),
+        engine.metadata_completeness(metadata),
+    )
+    # a failed extraction says nothing about the file; don't pin its fallout
+    if all(extract_cache.is_cacheable(x) for x in (metadata, c2pa)) and (not ffprobe or extract_cache.is_cacheable(ffprobe)):
+        with _DERIVED_CACHE_LOCK:
+            _DERIVED_CACHE[key] = derived
+    return derived
+
+
 def _one_line_rationale(trust_score: int, label: str, top_reasons: list[str]) -> str:
     reason = top_reasons[0] if top_reasons else "No dominant signals detected."
     return f"{label} trust ({trust_score}/100): {reason}"
 
 
-def analyze_media_file(path: str, filename: str) -> Dict[str, Any]:
+def analyze_media_file(
+    path: str,
+    filename: str,
+    *,
+    sha256: Optional[str] = None,
+    size_bytes: Optional[int] = None,
+) -> Dict[str, Any]:
+    # Callers that already hashed/sized the file while writing it (uploads) pass
+    # those values in so the file is not read a second time.
     media_type = engine.detect_media_type(path)
-    metadata = engine.extract_exiftool(path)
-    ffprobe = engine.extract_ffprobe(path) if media_type == "video" else {}
-    c2pa = engine.extract_c2pa(path)
 
-    provenance_state, summary = engine.classify_provenance(c2pa, metadata)
+    # The extractors (and hashing) are independent and mostly wait on a subprocess
+    # or disk, so they run concurrently; wall time is the slowest one, not the sum.
+    # The hash and tool versions come first: together they key the extract cache.
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        tools_future = pool.submit(engine.tool_versions)
+        if not sha256:
+            sha256, size_bytes = sha256_file_and_size(path)
+        tools = tools_future.result()
+
+        def extract(tool: str, fn):
+            version = (tools.get(tool) or {}).get("version")
+            args = engine.EXTRACT_ARGS.get(tool, ())
+            return pool.submit(extract_cache.cached_extract, tool, version, sha256, path, fn, args)
+
+        metadata_future = extract("exiftool", engine.extract_exiftool)
+        ffprobe_future = extract("ffprobe", engine.extract_ffprobe) if media_type == "video" else None
+        c2pa_future = extract("c2patool", engine.extract_c2pa)
+
+        metadata = metadata_future.result()
+        ffprobe = ffprobe_future.result() if ffprobe_future else {}
+        c2pa = c2pa_future.result()
+
+    (provenance_state, summary), transformations, metadata_consistency, metadata_completeness = _derived_metadata(
+        sha256, media_type, tools, metadata, ffprobe, c2pa
+    )
     ai_disclosure = engine.ai_disclosure_from_metadata(metadata)
-    transformations = engine.transformation_hints(metadata, ffprobe)
     derived_timeline = engine.derived_timeline(metadata)
-    metadata_consistency = engine.metadata_consistency(metadata)
-    metadata_completeness = engine.metadata_completeness(metadata)
-    tools = engine.tool_versions()
 
     duration_s = None
     if isinstance(ffprobe, dict):
@@ -125,10 +188,12 @@ def analyze_media_file(path: str, filename: str) -> Dict[str, Any]:
     analysis = {
         "filename": filename,
         "media_type": media_type,
-        "bytes": os.path.getsize(path),
-        "sha256": sha256_file(path),
+        "bytes": size_bytes if size_bytes is not None else os.path.getsize(path),
+        "sha256": sha256,
         "provenance_state": provenance_state,
         "summary": summary,
+        # the top-level c2pa/metadata/ffprobe keys are the one canonical copy of the
+        # raw extractor output; API responses that expose "raw_extracts" build it from these
         "c2pa": c2pa,
         "c2pa_summary": c2pa_summary,
         "metadata": metadata,
@@ -149,10 +214,30 @@ def analyze_media_file(path: str, filename: str) -> Dict[str, Any]:
     }
 
     analysis["one_line_rationale"] = _one_line_rationale(trust_score, label, top_reasons)
-    analysis["raw_extracts"] = {
-        "metadata": metadata,
-        "ffprobe": ffprobe,
-        "c2pa": c2pa,
-    }
 
-    return analysis
\ No newline at end of file
+    return analysis
+
+
+def _analyze_item(item: Tuple[str, str]) -> Dict[str, Any]:
+    path, filename = item
+    return analyze_media_file(path, filename)
+
+
+def analyze_batch(
+    items: Iterable[Tuple[str, str]],
+    max_workers: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Analyzes (path, filename) pairs across a process pool, returning results in input
+    order. Each worker keeps its own exiftool daemon and caches, so the per-process
+    setup is paid once per worker rather than once per file. The first failure raises.
+    """
+    items = list(items)
+    workers = min(max_workers or os.cpu_count() or 1, len(items))
+    if workers <= 1:
+        return [_analyze_item(item) for item in items]
+    # forkserver: workers start from a clean process rather than inheriting the
+    # caller's threads, sqlite handles or subprocess pipes
+    ctx = multiprocessing.get_context("forkserver")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as ex:
+        return list(ex.map(_analyze_item, items))
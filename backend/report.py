@@ -1,27 +1,64 @@
 from __future__ import annotations
 
 import datetime
+import functools
 import hashlib
+import io
 import json
 import os
-from typing import Any, Dict, List, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
 
-from reportlab.lib.pagesizes import LETTER
-from reportlab.lib.units import inch
-from reportlab.lib import colors
-from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
-from reportlab.lib.enums import TA_LEFT
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
+import orjson
+
+from backend.config import env_bool
+
+# ReportLab is only needed to render a PDF; import it on first use so importing this
+# module (or anything that re-exports it) stays cheap.
+if TYPE_CHECKING:
+    from reportlab.lib.styles import ParagraphStyle
+    from reportlab.platypus import Table
+
+
+class _ReportStyles(NamedTuple):
+    title: ParagraphStyle
+    h2: ParagraphStyle
+    body: ParagraphStyle
+    small: ParagraphStyle
+    caption: ParagraphStyle
+
+
+@functools.lru_cache(maxsize=None)
+def _get_styles() -> _ReportStyles:
+    # Built once per process; flowables only read their style, so sharing is safe.
+    from reportlab.lib.enums import TA_LEFT
+    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+
+    styles = getSampleStyleSheet()
+    return _ReportStyles(
+        title=ParagraphStyle("ts_title", parent=styles["Heading1"], fontName="Helvetica-Bold", fontSize=18, leading=22, alignment=TA_LEFT),
+        h2=ParagraphStyle("ts_h2", parent=styles["Heading2"], fontName="Helvetica-Bold", fontSize=12, leading=14, alignment=TA_LEFT),
+        body=ParagraphStyle("ts_body", parent=styles["BodyText"], fontName="Helvetica", fontSize=10, leading=13, alignment=TA_LEFT),
+        small=ParagraphStyle("ts_small", parent=styles["BodyText"], fontName="Helvetica", fontSize=9, leading=12, alignment=TA_LEFT),
+        caption=ParagraphStyle("ts_caption", fontSize=8, leading=10),
+    )
+
+
+_NUL_TBL = str.maketrans("", "", "\x00")
 
 
 def _safe_text(v: Any, max_len: int = 400) -> str:
     if v is None:
         return ""
-    s = str(v)
-    s = s.replace("\x00", "").strip()
-    if len(s) > max_len:
-        s = s[: max_len - 1] + "…"
-    return s
+    if isinstance(v, (int, float)):
+        # numbers (and bools) never contain NULs or surrounding whitespace
+        s = str(v)
+    else:
+        s = v if isinstance(v, str) else str(v)
+        if "\x00" in s:
+            s = s.translate(_NUL_TBL)
+        s = s.strip()
+    return s if len(s) <= max_len else s[: max_len - 1] + "…"
 
 
 def _as_dict(maybe: Any) -> Dict[str, Any]:
@@ -38,27 +75,73 @@ def _as_dict(maybe: Any) -> Dict[str, Any]:
     return {}
 
 
-def _hash_result_for_id(result: Dict[str, Any]) -> str:
-    payload = {
-        "filename": result.get("filename"),
-        "media_type": result.get("media_type"),
-        "sha256": result.get("sha256"),
-        "bytes": result.get("bytes"),
-        "provenance_state": result.get("provenance_state"),
-        "c2pa": result.get("c2pa"),
-        "metadata": result.get("metadata"),
-        "derived_timeline": result.get("derived_timeline"),
-        "metadata_consistency": result.get("metadata_consistency"),
-        "tools": result.get("tools"),
-    }
-    s = json.dumps(payload, sort_keys=True, ensure_ascii=False)
-    return hashlib.sha256(s.encode("utf-8", errors="replace")).hexdigest()
-
-
-def _kv_table(data: Dict[str, Any], col_widths: Tuple[float, float] = (2.2 * inch, 4.8 * inch)) -> Table:
-    rows = []
-    for k, v in data.items():
-        rows.append([_safe_text(k, 80), _safe_text(v, 800)])
+# v2 report IDs hash the report's identity and findings plus the analysis time as one
+# canonical orjson document (sorted keys); set TRUTHSIG_REPORT_ID_V2=false to reproduce
+# IDs from the older stdlib-json hash, which ignored the time and case evidence.
+REPORT_ID_V2 = env_bool("TRUTHSIG_REPORT_ID_V2", True)
+
+_REPORT_ID_FIELDS = (
+    "filename",
+    "media_type",
+    "sha256",
+    "bytes",
+    "provenance_state",
+    "c2pa",
+    "metadata",
+    "derived_timeline",
+    "metadata_consistency",
+    "tools",
+)
+_REPORT_ID_ORJSON_OPTS = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+
+
+def _replace_surrogates(v: Any) -> Any:
+    # orjson rejects lone surrogates; map them the way .encode(errors="replace") would
+    if isinstance(v, str):
+        return v.encode("utf-8", errors="replace").decode("utf-8")
+    if isinstance(v, dict):
+        return {_replace_surrogates(k): _replace_surrogates(x) for k, x in v.items()}
+    if isinstance(v, (list, tuple)):
+        return [_replace_surrogates(x) for x in v]
+    return v
+
+
+def _canonical_json(payload: Dict[str, Any]) -> bytes:
+    try:
+        return orjson.dumps(payload, option=_REPORT_ID_ORJSON_OPTS, default=str)
+    except orjson.JSONEncodeError:
+        return orjson.dumps(_replace_surrogates(payload), option=_REPORT_ID_ORJSON_OPTS, default=str)
+
+
+def _hash_result_for_id(result: Dict[str, Any], analyzed_at: Any = None) -> str:
+    payload = {k: result.get(k) for k in _REPORT_ID_FIELDS}
+    if not REPORT_ID_V2:
+        # Legacy IDs must stay byte-for-byte reproducible, so this keeps stdlib json's output.
+        s = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(s.encode("utf-8", errors="replace")).hexdigest()
+
+    # Case reports carry no file hash; their identity is the case and its evidence.
+    payload["analyzed_at"] = analyzed_at
+    payload["case_id"] = result.get("case_id")
+    payload["evidence"] = [
+        [str(e.get("id")), e.get("sha256")] for e in result.get("evidence") or [] if isinstance(e, dict)
+    ]
+    return hashlib.sha256(_canonical_json(payload)).hexdigest()
+
+
+def _kv_table(
+    data: Union[Dict[str, Any], Iterable[Tuple[Any, Any]]],
+    col_widths: Optional[Tuple[float, float]] = None,
+) -> Table:
+    """Two-column key/value table from a dict or from (key, value) rows."""
+    from reportlab.lib import colors
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Table, TableStyle
+
+    if col_widths is None:
+        col_widths = (2.2 * inch, 4.8 * inch)
+    items = data.items() if isinstance(data, dict) else data
+    rows = [[_safe_text(k, 80), _safe_text(v, 800)] for k, v in items]
     t = Table(rows, colWidths=list(col_widths))
     t.setStyle(
         TableStyle(
@@ -78,7 +161,80 @@ def _kv_table(data: Dict[str, Any], col_widths: Tuple[float, float] = (2.2 * inc
     return t
 
 
+@functools.lru_cache(maxsize=None)
+def _integrity_block_cls() -> type:
+    from reportlab.lib import colors
+    from reportlab.lib.units import inch
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+    from reportlab.platypus import Flowable
+
+    class IntegrityBlock(Flowable):
+        """
+        Short, fixed key/value lines drawn straight onto the canvas, styled like
+        _kv_table; skips Paragraph parsing and table layout for static text.
+        Splits between rows at a page break; `first_row` keeps the striping going.
+        """
+
+        row_h = 15
+        font = ("Helvetica", 9)
+
+        def __init__(self, rows: List[Tuple[str, str]], first_row: int = 0) -> None:
+            super().__init__()
+            self.rows = rows
+            self.first_row = first_row
+            self.key_w, self.width = 2.2 * inch, 7.0 * inch
+            self.height = self.row_h * len(rows)
+            self.hAlign = "CENTER"
+
+        def wrap(self, avail_width: float, avail_height: float) -> Tuple[float, float]:
+            return self.width, self.height
+
+        def split(self, avail_width: float, avail_height: float) -> List[Flowable]:
+            n = int(avail_height // self.row_h)
+            if n <= 0 or n >= len(self.rows):
+                return []
+            return [
+                IntegrityBlock(self.rows[:n], self.first_row),
+                IntegrityBlock(self.rows[n:], self.first_row + n),
+            ]
+
+        def _fit(self, text: str, width: float) -> str:
+            if stringWidth(text, *self.font) <= width:
+                return text
+            while text and stringWidth(text + "…", *self.font) > width:
+                text = text[:-1]
+            return text + "…"
+
+        def draw(self) -> None:
+            c = self.canv
+            c.setFont(*self.font)
+            c.setLineWidth(0.25)
+            for i, (k, v) in enumerate(self.rows):
+                y = self.height - (i + 1) * self.row_h
+                c.setFillColor(colors.whitesmoke if (self.first_row + i) % 2 == 0 else colors.white)
+                c.rect(0, y, self.width, self.row_h, stroke=0, fill=1)
+                c.setFillColor(colors.black)
+                c.drawString(6, y + 4.5, self._fit(k, self.key_w - 12))
+                c.drawString(self.key_w + 6, y + 4.5, self._fit(v, self.width - self.key_w - 12))
+                c.setStrokeColor(colors.lightgrey)
+                c.line(0, y, self.width, y)
+
+    return IntegrityBlock
+
+
+def _tool_version_lines(tools: Any) -> List[str]:
+    if not isinstance(tools, dict):
+        return [_safe_text(tools, 200)] if tools else []
+    lines = []
+    for name, info in tools.items():
+        version = info.get("version") if isinstance(info, dict) else info
+        lines.append(f"{_safe_text(name, 40)}: {_safe_text(version, 200) or 'unavailable'}")
+    return lines
+
+
 def _bullets(title: str, items: List[str], style_title: ParagraphStyle, style_body: ParagraphStyle) -> List[Any]:
+    from reportlab.platypus import Paragraph
+
     out: List[Any] = []
     out.append(Paragraph(_safe_text(title, 120), style_title))
     if items:
@@ -88,21 +244,44 @@ def _bullets(title: str, items: List[str], style_title: ParagraphStyle, style_bo
     out.append(Paragraph(html, style_body))
     return out
 
-def _add_image(story: List[Any], path: str, caption: str, width: float = 4.8 * inch) -> None:
+def _read_artifact(path: Optional[str]) -> Optional[io.BytesIO]:
     if not path:
+        return None
+    try:
+        with open(path, "rb") as f:
+            return io.BytesIO(f.read())
+    except OSError:
+        return None
+
+
+def _load_artifacts(paths: List[Optional[str]]) -> List[Optional[io.BytesIO]]:
+    # Artifact files are read concurrently up front; ReportLab then works from memory
+    # (JPEGs are embedded as-is, so there is no decode to parallelise beyond the read).
+    if len(paths) < 2:
+        return [_read_artifact(p) for p in paths]
+    with ThreadPoolExecutor(max_workers=min(4, len(paths))) as pool:
+        return list(pool.map(_read_artifact, paths))
+
+
+def _add_image(story: List[Any], source: Any, caption: str, width: Optional[float] = None) -> None:
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Image, Paragraph, Spacer
+
+    if width is None:
+        width = 4.8 * inch
+    if not source:
         return
-    if not os.path.exists(path):
+    if isinstance(source, str) and not os.path.exists(source):
         return
     try:
-        img = Image(path, width=width, height=width * 0.6)
+        img = Image(source, width=width, height=width * 0.6)
         story.append(img)
-        story.append(Paragraph(_safe_text(caption, 160), ParagraphStyle("ts_caption", fontSize=8, leading=10)))
+        story.append(Paragraph(_safe_text(caption, 160), _get_styles().caption))
         story.append(Spacer(1, 0.12 * inch))
     except Exception:
         return
 
 
-
 def build_pdf_report(result: Any, out_path: str) -> None:
     # ---- Type safety ----
     if isinstance(result, str):
@@ -113,11 +292,11 @@ def build_pdf_report(result: Any, out_path: str) -> None:
     if not isinstance(result, dict):
         raise ValueError(f"build_pdf_report expected dict, got {type(result)}")
 
-    styles = getSampleStyleSheet()
-    title = ParagraphStyle("ts_title", parent=styles["Heading1"], fontName="Helvetica-Bold", fontSize=18, leading=22, alignment=TA_LEFT)
-    h2 = ParagraphStyle("ts_h2", parent=styles["Heading2"], fontName="Helvetica-Bold", fontSize=12, leading=14, alignment=TA_LEFT)
-    body = ParagraphStyle("ts_body", parent=styles["BodyText"], fontName="Helvetica", fontSize=10, leading=13, alignment=TA_LEFT)
-    small = ParagraphStyle("ts_small", parent=styles["BodyText"], fontName="Helvetica", fontSize=9, leading=12, alignment=TA_LEFT)
+    from reportlab.lib.pagesizes import LETTER
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer
+
+    title, h2, body, small, _ = _get_styles()
 
     doc = SimpleDocTemplate(out_path, pagesize=LETTER, leftMargin=0.8 * inch, rightMargin=0.8 * inch, topMargin=0.8 * inch, bottomMargin=0.8 * inch)
     story: List[Any] = []
@@ -136,9 +315,9 @@ def build_pdf_report(result: Any, out_path: str) -> None:
 
     # Report ID / integrity
     integrity = _as_dict(result.get("report_integrity"))
-    analyzed_at = integrity.get("timestamp") or integrity.get("analyzed_at") or datetime.datetime.utcnow().strftime("%Y-%m-%d %H:%M UTC")
+    analyzed_at = integrity.get("timestamp") or integrity.get("analyzed_at") or datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%d %H:%M UTC")
 
-    report_hash = _hash_result_for_id(result)
+    report_hash = _hash_result_for_id(result, analyzed_at)
     report_id = report_hash[:12]
 
     story.append(Paragraph("Executive summary", h2))
@@ -222,7 +401,7 @@ def build_pdf_report(result: Any, out_path: str) -> None:
     timeline = _as_dict(result.get("derived_timeline"))
     story.append(Paragraph("Forensic timeline (from metadata)", h2))
     if timeline.get("events"):
-        timeline_rows = {e.get("key"): e.get("value") for e in timeline.get("events", [])}
+        timeline_rows = [(e.get("key"), e.get("value")) for e in timeline.get("events", [])]
         story.append(_kv_table(timeline_rows))
     else:
         story.append(_kv_table({"Notes": timeline.get("notes") or "No timeline signals available."}))
@@ -233,11 +412,11 @@ def build_pdf_report(result: Any, out_path: str) -> None:
     markers = (forensics.get("results") or {}).get("timeline_markers") or []
     if markers:
         story.append(Paragraph("Video timeline markers", h2))
-        marker_rows = {
-            f"T+{m.get('time_s', 0):.1f}s": f"Score {m.get('score', '')}"
+        marker_rows = [
+            (f"T+{m.get('time_s', 0):.1f}s", f"Score {m.get('score', '')}")
             for m in markers[:6]
             if m.get("status") == "OK"
-        }
+        ]
         story.append(_kv_table(marker_rows))
         story.append(Spacer(1, 0.12 * inch))
 
@@ -250,14 +429,18 @@ def build_pdf_report(result: Any, out_path: str) -> None:
 
     # Visual artifacts
     story.append(Paragraph("Visual artifacts", h2))
-    if forensics.get("type") == "image":
-        heatmap_path = (forensics.get("results") or {}).get("heatmap_path")
-        _add_image(story, heatmap_path, "ELA heatmap (image)")
-    elif forensics.get("type") == "video":
-        flagged = (forensics.get("results") or {}).get("flagged_frames") or []
-        for frame in flagged[:3]:
-            _add_image(story, frame.get("thumbnail_path"), "Flagged frame")
-            _add_image(story, frame.get("heatmap_path"), "Frame ELA heatmap")
+    if forensics.get("type") in ("image", "video"):
+        visuals: List[Tuple[Optional[str], str]] = []
+        if forensics.get("type") == "image":
+            visuals.append(((forensics.get("results") or {}).get("heatmap_path"), "ELA heatmap (image)"))
+        else:
+            flagged = (forensics.get("results") or {}).get("flagged_frames") or []
+            for frame in flagged[:3]:
+                visuals.append((frame.get("thumbnail_path"), "Flagged frame"))
+                visuals.append((frame.get("heatmap_path"), "Frame ELA heatmap"))
+        loaded = _load_artifacts([p for p, _ in visuals])
+        for data, (_, caption) in zip(loaded, visuals):
+            _add_image(story, data, caption)
     else:
         story.append(Paragraph("No visual artifacts available.", body))
         story.append(Spacer(1, 0.12 * inch))
@@ -287,24 +470,25 @@ def build_pdf_report(result: Any, out_path: str) -> None:
     custody = result.get("chain_of_custody") or []
     if custody:
         story.append(Paragraph("Chain of custody", h2))
-        custody_rows = {
-            f"{_safe_text(e.get('event_type'), 40)} @ {_safe_text(e.get('created_at'), 40)}": _safe_text(
-                (e.get("details_json") or e.get("details") or "")
+        custody_rows = [
+            (
+                f"{_safe_text(e.get('event_type'), 40)} @ {_safe_text(e.get('created_at'), 40)}",
+                _safe_text(e.get("details_json") or e.get("details") or ""),
             )
             for e in custody[:8]
-        }
+        ]
         story.append(_kv_table(custody_rows))
         story.append(Spacer(1, 0.18 * inch))
 
 
     # Report integrity block
-    tools = result.get("tools") or {}
-    integrity_kv = {
-        "Report hash (SHA-256)": report_hash,
-        "Analysis timestamp (UTC)": analyzed_at,
-        "Tool versions": _safe_text(tools, 1200),
-    }
+    tool_lines = _tool_version_lines(result.get("tools") or {}) or [""]
+    integrity_rows = [
+        ("Report hash (SHA-256)", report_hash),
+        ("Analysis timestamp (UTC)", _safe_text(analyzed_at, 80)),
+    ]
+    integrity_rows += [("Tool versions" if i == 0 else "", line) for i, line in enumerate(tool_lines)]
     story.append(Paragraph("Report integrity", h2))
-    story.append(_kv_table(integrity_kv))
+    story.append(_integrity_block_cls()(integrity_rows))
 
     doc.build(story)
@@ -0,0 +1,218 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import jwt
+from fastapi.security import HTTPAuthorizationCredentials
+from fastapi.testclient import TestClient
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from backend import db, main
+
+
+def _creds(token):
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+
+class AuthCacheTests(unittest.TestCase):
+    def setUp(self):
+        main._token_cache.clear()
+        main._USER_CACHE.clear()
+
+    def test_verified_tokens_are_decoded_once(self):
+        token = main.make_token("u1")
+        with mock.patch.object(main.jwt, "decode", wraps=jwt.decode) as decode:
+            for _ in range(3):
+                self.assertEqual(asyncio.run(main._decode_token(token))["sub"], "u1")
+        self.assertEqual(decode.call_count, 1)
+
+    def test_invalid_tokens_are_not_cached(self):
+        bad = jwt.encode({"sub": "u1"}, "wrong-secret", algorithm=main.JWT_ALG)
+        with mock.patch.object(main.jwt, "decode", wraps=jwt.decode) as decode:
+            for _ in range(2):
+                with self.assertRaises(jwt.InvalidSignatureError):
+                    asyncio.run(main._decode_token(bad))
+        self.assertEqual(decode.call_count, 2)
+
+    def test_user_rows_are_cached_until_forgotten(self):
+        row = {"id": "u1", "is_active": True, "is_approved": True}
+        get_user = mock.AsyncMock(side_effect=lambda pool, user_id: dict(row))
+        creds = _creds(main.make_token("u1"))
+        with mock.patch.object(db, "get_user_by_id", get_user):
+            asyncio.run(main.require_user(None, creds))
+            asyncio.run(main.require_user(None, creds))
+            self.assertEqual(get_user.await_count, 1)
+
+            # a local write (e.g. disabling the account) must take effect immediately
+            row["is_active"] = False
+            main._forget_user("u1")
+            with self.assertRaises(main.HTTPException) as ctx:
+                asyncio.run(main.require_user(None, creds))
+        self.assertEqual(ctx.exception.status_code, 403)
+        self.assertEqual(get_user.await_count, 2)
+
+
+class ArtifactResponseTests(unittest.TestCase):
+    def setUp(self):
+        main._ARTIFACT_ETAGS.clear()
+        os.makedirs(main.ARTIFACT_ROOT, exist_ok=True)
+        fd, self.path = tempfile.mkstemp(suffix=".jpg", dir=main.ARTIFACT_ROOT)
+        with os.fdopen(fd, "wb") as f:
+            f.write(b"\xff\xd8\xff" + os.urandom(4096))
+        self.addCleanup(os.remove, self.path)
+
+        evidence = {"analysis_json": {"forensics": {"results": {"status": "CLEAR", "heatmap_path": self.path}}}}
+        for target, name, value in (
+            (main, "require_user", mock.AsyncMock(return_value={"id": "u1"})),
+            (db, "get_case", mock.AsyncMock(return_value={"id": "c1"})),
+            (db, "get_case_evidence", mock.AsyncMock(return_value=evidence)),
+        ):
+            patcher = mock.patch.object(target, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        async def fake_pool():
+            return object()
+
+        main.app.dependency_overrides[main.get_pool] = fake_pool
+        self.addCleanup(main.app.dependency_overrides.pop, main.get_pool, None)
+        # no context manager: startup (DB pool, event consumers) is not run
+        self.client = TestClient(main.app)
+
+    def test_etag_revalidation_returns_304(self):
+        url = "/cases/c1/evidence/e1/artifact?kind=heatmap"
+        first = self.client.get(url, headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.headers["cache-control"], main.ARTIFACT_CACHE_CONTROL)
+        # already-compressed artifacts skip the gzip middleware
+        self.assertNotIn("content-encoding", first.headers)
+        etag = first.headers["etag"]
+
+        again = self.client.get(url, headers={"If-None-Match": etag})
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again.headers["etag"], etag)
+        self.assertEqual(again.content, b"")
+
+        stale = self.client.get(url, headers={"If-None-Match": '"stale"'})
+        self.assertEqual(stale.status_code, 200)
+        self.assertEqual(stale.headers["etag"], etag)
+        self.assertEqual(stale.content, first.content)
+
+
+class JSONGZipMiddlewareTests(unittest.TestCase):
+    def test_compresses_json_but_not_artifacts_or_reports(self):
+        async def big_json(request):
+            return JSONResponse({"items": ["x" * 50] * 100})
+
+        async def binary(request):
+            return Response(b"\x00" * 4096, media_type="application/octet-stream")
+
+        app = Starlette(
+            routes=[
+                Route("/analyze", big_json),
+                Route("/cases/c/evidence/e/artifact", binary),
+                Route("/report", binary),
+            ]
+        )
+        app.add_middleware(main.JSONGZipMiddleware, minimum_size=1024, compresslevel=5)
+        client = TestClient(app)
+        headers = {"Accept-Encoding": "gzip"}
+
+        self.assertEqual(client.get("/analyze", headers=headers).headers.get("content-encoding"), "gzip")
+        for path in ("/cases/c/evidence/e/artifact", "/report"):
+            self.assertNotIn("content-encoding", client.get(path, headers=headers).headers)
+
+
+class EventQueueTests(unittest.TestCase):
+    def test_consumer_writes_queued_events_in_one_batch(self):
+        batches = []
+
+        async def insert_events(pool, events):
+            batches.append(list(events))
+
+        async def scenario():
+            queue = asyncio.Queue()
+            for i in range(5):
+                queue.put_nowait({"event_type": "E", "n": i})
+            consumer = asyncio.create_task(main._event_consumer(None, queue))
+            await asyncio.wait_for(queue.join(), timeout=5)
+            consumer.cancel()
+
+        with mock.patch.object(db, "insert_events", insert_events):
+            asyncio.run(scenario())
+        self.assertEqual(batches, [[{"event_type": "E", "n": i} for i in range(5)]])
+
+    def test_failed_batch_is_retried_row_by_row(self):
+        async def insert_events(pool, events):
+            raise RuntimeError("batch rejected")
+
+        written = []
+
+        async def insert_event(pool, **event):
+            if event["n"] == 1:
+                raise RuntimeError("bad row")
+            written.append(event["n"])
+
+        async def scenario():
+            queue = asyncio.Queue()
+            for i in range(3):
+                queue.put_nowait({"event_type": "EVIDENCE_UPLOADED", "n": i})
+            consumer = asyncio.create_task(main._event_consumer(None, queue))
+            await asyncio.wait_for(queue.join(), timeout=5)
+            consumer.cancel()
+
+        with mock.patch.object(db, "insert_events", insert_events), mock.patch.object(db, "insert_event", insert_event):
+            asyncio.run(scenario())
+        # only the row the database rejects on its own is dropped
+        self.assertEqual(written, [0, 2])
+
+    def test_flush_waits_for_queued_events(self):
+        batches = []
+
+        async def insert_events(pool, events):
+            await asyncio.sleep(0.01)
+            batches.append(len(events))
+
+        async def scenario():
+            main.app.state.event_queue = asyncio.Queue()
+            consumer = asyncio.create_task(main._event_consumer(None, main.app.state.event_queue))
+            await main._record_event(None, event_type="SCAN_CREATED")
+            await main._flush_events()
+            consumer.cancel()
+            return list(batches)
+
+        old = getattr(main.app.state, "event_queue", None)
+        try:
+            with mock.patch.object(db, "insert_events", insert_events):
+                self.assertEqual(asyncio.run(scenario()), [1])
+        finally:
+            main.app.state.event_queue = old
+
+    def test_record_event_writes_inline_without_a_running_queue(self):
+        insert_event = mock.AsyncMock()
+        old = getattr(main.app.state, "event_queue", None)
+        try:
+            with mock.patch.object(db, "insert_event", insert_event):
+                main.app.state.event_queue = None
+                asyncio.run(main._record_event("pool", event_type="E"))
+
+                async def full_queue():
+                    main.app.state.event_queue = asyncio.Queue(maxsize=1)
+                    main.app.state.event_queue.put_nowait({})
+                    await main._record_event("pool", event_type="F")
+
+                asyncio.run(full_queue())
+        finally:
+            main.app.state.event_queue = old
+        self.assertEqual(
+            insert_event.await_args_list,
+            [mock.call("pool", event_type="E"), mock.call("pool", event_type="F")],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
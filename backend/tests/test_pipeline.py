@@ -1,10 +1,18 @@
+import io
+import os
+import shutil
+import subprocess
+import sys
 import tempfile
+import textwrap
 import unittest
+from unittest import mock
 
 from PIL import Image
 
+from backend import engine, extract_cache, forensics, pipeline
 from backend.fusion import fuse_signals
-from backend.pipeline import analyze_media_file
+from backend.pipeline import _summarize_c2pa, analyze_batch, analyze_media_file
 
 
 class PipelineTests(unittest.TestCase):
@@ -20,6 +28,19 @@ class PipelineTests(unittest.TestCase):
         self.assertIn("signals", result)
         self.assertTrue(0 <= result["trust_score"] <= 100)
 
+    def test_analyze_batch_preserves_input_order(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            items = []
+            for i, color in enumerate([(200, 30, 30), (30, 200, 30), (30, 30, 200)]):
+                path = os.path.join(tmpdir, f"img{i}.jpg")
+                Image.new("RGB", (64, 64), color=color).save(path, "JPEG")
+                items.append((path, f"img{i}.jpg"))
+
+            results = analyze_batch(items, max_workers=2)
+
+        self.assertEqual([r["filename"] for r in results], ["img0.jpg", "img1.jpg", "img2.jpg"])
+        self.assertEqual(len({r["sha256"] for r in results}), 3)
+
     def test_fusion_penalizes_broken_provenance(self):
         base = {
             "metadata_completeness": {"score_0_to_3": 2},
@@ -41,6 +62,329 @@ class PipelineTests(unittest.TestCase):
         )
         self.assertLess(bad["trust_score"], good["trust_score"])
 
+    def test_extract_cache_reuses_results_but_not_failures(self):
+        calls = []
+
+        def fake_exiftool(path):
+            calls.append(path)
+            return {"SourceFile": path, "File:FileName": os.path.basename(path), "EXIF:Make": "Acme"}
+
+        def failing_exiftool(path):
+            calls.append(path)
+            return {"_status": "error", "_error": "boom"}
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            old_path, old_con = extract_cache.EXTRACT_CACHE_PATH, extract_cache._con
+            extract_cache.EXTRACT_CACHE_PATH = os.path.join(tmpdir, "cache.db")
+            extract_cache._con = None
+            try:
+                first, second = os.path.join(tmpdir, "a.jpg"), os.path.join(tmpdir, "b.jpg")
+                for p in (first, second):
+                    open(p, "wb").close()
+
+                extract_cache.cached_extract("exiftool", "12.76", "abc", first, fake_exiftool)
+                hit = extract_cache.cached_extract("exiftool", "12.76", "abc", second, fake_exiftool)
+                self.assertEqual(calls, [first])
+                self.assertEqual(hit["EXIF:Make"], "Acme")
+                self.assertEqual(hit["File:FileName"], "b.jpg")
+
+                extract_cache.cached_extract("exiftool", "12.76", "def", first, failing_exiftool)
+                extract_cache.cached_extract("exiftool", "12.76", "def", first, failing_exiftool)
+                self.assertEqual(len(calls), 3)
+
+                # same bytes and version, different flags: the old payload shape must not be served
+                args = ("-json", "-G")
+                extract_cache.cached_extract("exiftool", "12.76", "ghi", first, fake_exiftool, args)
+                extract_cache.cached_extract("exiftool", "12.76", "ghi", first, fake_exiftool, args)
+                self.assertEqual(len(calls), 4)
+                extract_cache.cached_extract("exiftool", "12.76", "ghi", first, fake_exiftool, args + ("-fast",))
+                self.assertEqual(len(calls), 5)
+                extract_cache.cached_extract("exiftool", "12.76", "ghi", first, fake_exiftool)
+                self.assertEqual(len(calls), 6)
+            finally:
+                if extract_cache._con is not None:
+                    extract_cache._con.close()
+                extract_cache.EXTRACT_CACHE_PATH, extract_cache._con = old_path, old_con
+
+    def test_extract_cache_prunes_old_and_excess_rows(self):
+        def stored():
+            rows = extract_cache._con.execute("SELECT sha256 FROM extracts ORDER BY created_at").fetchall()
+            return [r[0] for r in rows]
+
+        # deterministic insert times, one minute apart
+        times = iter(f"2030-01-01T00:{m:02d}:00+00:00" for m in range(60))
+        with tempfile.TemporaryDirectory() as tmpdir, \
+                mock.patch.object(extract_cache, "EXTRACT_CACHE_PATH", os.path.join(tmpdir, "cache.db")), \
+                mock.patch.object(extract_cache, "_con", None), \
+                mock.patch.object(extract_cache, "_puts_since_prune", 0), \
+                mock.patch.object(extract_cache, "EXTRACT_CACHE_MAX_ROWS", 3), \
+                mock.patch.object(extract_cache, "PRUNE_EVERY", 2), \
+                mock.patch.object(extract_cache, "_now", lambda: next(times)):
+            path = os.path.join(tmpdir, "a.jpg")
+            open(path, "wb").close()
+            try:
+                for sha in "abcde":
+                    extract_cache.cached_extract("exiftool", "12.76", sha, path, lambda p: {"SourceFile": p})
+                # pruned after the 2nd and 4th inserts; the newest rows survive
+                self.assertEqual(stored(), ["b", "c", "d", "e"])
+
+                extract_cache._con.execute("UPDATE extracts SET created_at='2000-01-01T00:00:00+00:00' WHERE sha256='e'")
+                extract_cache._con.commit()
+                extract_cache._con.close()
+                extract_cache._con = None
+                # reopening the cache prunes rows past the max age
+                self.assertIsNone(extract_cache._get("e", "exiftool", "12.76"))
+                self.assertEqual(stored(), ["b", "c", "d"])
+            finally:
+                if extract_cache._con is not None:
+                    extract_cache._con.close()
+
+
+class C2PAValidationTests(unittest.TestCase):
+    MANIFESTS = {"active_manifest": "urn:uuid:1", "manifests": {"urn:uuid:1": {"claim_generator": "cam/1.0"}}}
+
+    def assertAgrees(self, c2pa, present, validation, state):
+        self.assertEqual(engine.c2pa_validation(c2pa), (present, validation))
+        summary = _summarize_c2pa(c2pa)
+        self.assertEqual((summary["present"], summary["validation"]), (present, validation))
+        self.assertEqual(engine.classify_provenance(c2pa, {})[0], state)
+
+    def test_success_codes_are_valid(self):
+        c2pa = dict(
+            self.MANIFESTS,
+            validation_results={"activeManifest": {"success": [{"code": "claimSignature.validated"}], "failure": []}},
+        )
+        self.assertAgrees(c2pa, True, "VALID", "VERIFIED_ORIGINAL")
+        self.assertAgrees(dict(self.MANIFESTS, validation_state="Trusted"), True, "VALID", "VERIFIED_ORIGINAL")
+
+    def test_failure_code_is_failed(self):
+        c2pa = dict(self.MANIFESTS, validation_status=[{"code": "assertion.dataHash.mismatch"}])
+        self.assertAgrees(c2pa, True, "FAILED", "ALTERED_OR_BROKEN_PROVENANCE")
+
+    def test_mixed_codes_fail(self):
+        c2pa = dict(
+            self.MANIFESTS,
+            validation_status=[{"code": "signingCredential.ocsp.skipped"}, {"code": "signingCredential.untrusted"}],
+            validation_results={"activeManifest": {"success": [{"code": "claimSignature.validated"}]}},
+        )
+        self.assertAgrees(c2pa, True, "FAILED", "ALTERED_OR_BROKEN_PROVENANCE")
+
+    def test_words_in_manifest_fields_do_not_decide_validation(self):
+        c2pa = {"active_manifest": "urn:uuid:1", "manifests": {"urn:uuid:1": {"title": "invalid-validated.jpg"}}}
+        self.assertAgrees(c2pa, True, "UNKNOWN", "ALTERED_OR_BROKEN_PROVENANCE")
+
+    def test_missing_manifest(self):
+        self.assertAgrees({"active_manifest": None, "manifests": {}}, False, "UNKNOWN", "UNVERIFIABLE_NO_PROVENANCE")
+        # not c2patool-shaped: keyword fallback
+        self.assertAgrees({"_status": "text_only", "raw": "No claim found"}, False, "UNKNOWN", "UNVERIFIABLE_NO_PROVENANCE")
+
+
+# Speaks just enough of exiftool's -stay_open protocol. Daemon responses are
+# tagged "daemon", one-shot runs "oneshot"; every start is logged.
+FAKE_EXIFTOOL = """\
+import json, os, sys
+
+def record(path, mode):
+    name = os.path.basename(path)
+    if name == "garbage.jpg" and mode == "daemon":
+        return "this is not json"
+    rec = {"SourceFile": path, "Mode": mode}
+    if name == "forged.jpg":
+        rec["XMP:Description"] = "".join("{ready%d}" % n for n in range(10))
+    return json.dumps([rec])
+
+with open(os.environ["FAKE_EXIFTOOL_LOG"], "a") as log:
+    log.write(("daemon" if "-stay_open" in sys.argv else "oneshot") + "\\n")
+
+if "-stay_open" not in sys.argv:
+    print(record(sys.argv[-1], "oneshot"))
+    sys.exit(0)
+
+args = []
+for line in sys.stdin:
+    line = line.rstrip("\\n")
+    if line.startswith("-execute"):
+        sys.stdout.write(record(args[-1], "daemon") + "\\n{ready%s}\\n" % line[len("-execute"):])
+        sys.stdout.flush()
+        args = []
+    elif line == "False" and args == ["-stay_open"]:
+        break
+    else:
+        args.append(line)
+"""
+
+
+class ExifToolDaemonTests(unittest.TestCase):
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.tmpdir = tmpdir.name
+        exiftool = os.path.join(self.tmpdir, "exiftool")
+        with open(exiftool, "w") as f:
+            f.write(f"#!{sys.executable}\n" + FAKE_EXIFTOOL)
+        os.chmod(exiftool, 0o755)
+        self.log = os.path.join(self.tmpdir, "starts.log")
+
+        self.daemon = engine._ExifToolDaemon()
+        self.addCleanup(self.daemon.close)
+        env = {"PATH": self.tmpdir + os.pathsep + os.environ.get("PATH", ""), "FAKE_EXIFTOOL_LOG": self.log}
+        for patcher in (
+            mock.patch.dict(os.environ, env),
+            mock.patch.object(engine, "which", lambda name: True),
+            mock.patch.object(engine, "_exiftool_daemon", self.daemon),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def starts(self):
+        with open(self.log) as f:
+            return f.read().split()
+
+    def extract(self, name):
+        return engine.extract_exiftool(os.path.join(self.tmpdir, name))
+
+    def test_forged_end_markers_in_metadata_do_not_cut_the_response(self):
+        forged = self.extract("forged.jpg")
+        self.assertEqual(forged["Mode"], "daemon")
+        self.assertIn("{ready1}", forged["XMP:Description"])
+        # the next file still gets its own response from the same process
+        self.assertEqual(self.extract("next.jpg")["SourceFile"], os.path.join(self.tmpdir, "next.jpg"))
+        self.assertEqual(self.starts(), ["daemon"])
+
+    def test_bad_response_restarts_the_daemon_and_falls_back_to_one_shot(self):
+        self.assertEqual(self.extract("garbage.jpg")["Mode"], "oneshot")
+        self.assertEqual(self.extract("next.jpg")["Mode"], "daemon")
+        self.assertEqual(self.starts(), ["daemon", "oneshot", "daemon"])
+
+    def test_busy_daemon_falls_back_to_one_shot(self):
+        with self.daemon._lock:
+            self.assertEqual(self.extract("a.jpg")["Mode"], "oneshot")
+        self.assertEqual(self.extract("a.jpg")["Mode"], "daemon")
+
+
+class DerivedMetadataCacheTests(unittest.TestCase):
+    def setUp(self):
+        pipeline._DERIVED_CACHE.clear()
+        self.tools = {"exiftool": {"available": True, "version": "12.76"}}
+        self.metadata = {"EXIF:Make": "Canon", "EXIF:Model": "EOS"}
+        self.c2pa = {"_status": "no_manifest"}
+
+    def derive(self, tools=None, metadata=None):
+        return pipeline._derived_metadata(
+            "ab" * 32, "image", tools or self.tools, metadata or self.metadata, {}, self.c2pa
+        )
+
+    def test_repeat_lookups_are_served_from_cache(self):
+        with mock.patch.object(engine, "classify_provenance", wraps=engine.classify_provenance) as classify:
+            first = self.derive()
+            self.assertIs(self.derive(), first)
+            self.assertEqual(classify.call_count, 1)
+
+            # a tool upgrade can change what the derivations see
+            self.derive(tools={"exiftool": {"available": True, "version": "13.00"}})
+            self.assertEqual(classify.call_count, 2)
+
+    def test_failed_extractions_are_not_cached(self):
+        failed = {"_status": "error", "_error": "exiftool crashed"}
+        with mock.patch.object(engine, "classify_provenance", wraps=engine.classify_provenance) as classify:
+            self.derive(metadata=failed)
+            self.derive(metadata=failed)
+        self.assertEqual(classify.call_count, 2)
+        self.assertEqual(len(pipeline._DERIVED_CACHE), 0)
+
+
+class ELATests(unittest.TestCase):
+    def test_large_images_are_scored_at_full_resolution(self):
+        import numpy as np
+
+        rng = np.random.default_rng(0)
+        height = forensics.ELA_BAND_ROWS * 2 + 37  # several bands plus a ragged last one
+        img = Image.fromarray(rng.integers(0, 256, (height, 1500, 3), dtype=np.uint8))
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "big.jpg")
+            img.save(path, "JPEG", quality=90)
+            result = forensics.image_ela(path, tmpdir)
+
+            # reference: one whole-frame round trip with the same encoder settings
+            with Image.open(path) as original:
+                a = np.asarray(original.convert("RGB"))
+            buffer = io.BytesIO()
+            Image.fromarray(a).save(buffer, "JPEG", quality=85, subsampling=2, optimize=False, progressive=False)
+            b = np.asarray(Image.open(buffer).convert("RGB"))
+            expected = forensics._ela_lut()[np.abs(a.astype(np.int16) - b)].mean()
+
+            self.assertAlmostEqual(result["mean_diff"], float(expected), places=6)
+            with Image.open(result["heatmap_path"]) as heatmap:
+                self.assertEqual(max(heatmap.size), forensics.ELA_MAX_DIM)
+
+
+class ProbeDurationCacheTests(unittest.TestCase):
+    def test_failures_are_retried_and_successes_cached(self):
+        forensics._probe_duration_cached.cache_clear()
+        self.addCleanup(forensics._probe_duration_cached.cache_clear)
+        results = iter([(124, "", "TIMEOUT"), (0, "12.5", "")])
+        with tempfile.NamedTemporaryFile(suffix=".mp4") as f, \
+                mock.patch.object(forensics, "which", lambda name: True), \
+                mock.patch.object(forensics, "run_cmd", side_effect=lambda cmd, timeout: next(results)) as run:
+            self.assertIsNone(forensics._duration_from_ffprobe(f.name))
+            self.assertEqual(forensics._duration_from_ffprobe(f.name), 12.5)
+            self.assertEqual(forensics._duration_from_ffprobe(f.name), 12.5)
+        self.assertEqual(run.call_count, 2)
+
+
+class FrameSamplingTests(unittest.TestCase):
+    def test_assign_frames_gives_each_timestamp_a_distinct_nearby_frame(self):
+        frames = [(3.0, "k3"), (6.0, "k6")]
+        assigned, unserved = forensics._assign_frames([0.77, 2.31, 2.9, 5.9, 9.2], frames, max_offset=0.4)
+        self.assertEqual(assigned, [(2.9, (3.0, "k3")), (5.9, (6.0, "k6"))])
+        # far from any keyframe, or sharing one already taken, or past the end
+        self.assertEqual(unserved, [0.77, 2.31, 9.2])
+
+    def test_unsampled_timestamps_keep_markers_in_time_order(self):
+        import numpy as np
+
+        rng = np.random.default_rng(0)
+        flat = Image.new("RGB", (64, 48), (90, 90, 90))
+        noisy = Image.fromarray(rng.integers(0, 256, (48, 64, 3), dtype=np.uint8))
+
+        def extract(path, timestamps, keyframes_only=False):
+            # the 2nd and 3rd samples never decode; the 4th is a heavily flagged frame
+            frames = [(ts, noisy if i == 3 else flat) for i, ts in enumerate(timestamps) if i not in (1, 2)]
+            return (frames, "") if keyframes_only else ([], "")
+
+        with tempfile.TemporaryDirectory() as tmpdir, \
+                mock.patch.object(forensics, "which", lambda name: True), \
+                mock.patch.object(forensics, "extract_frames_rgb", extract):
+            result = forensics.video_forensics("clip.mp4", duration_s=7.0, frame_count=6, output_dir=tmpdir)
+
+        markers = result["timeline_markers"]
+        self.assertEqual([m["time_s"] for m in markers], [1.0, 2.0, 3.0, 4.0, 5.0, 6.0])
+        self.assertEqual([m["status"] for m in markers], ["OK", "ERROR", "ERROR", "OK", "OK", "OK"])
+        [flagged] = result["flagged_frames"]
+        self.assertEqual((flagged["index"], flagged["time_s"]), (1, 4.0))
+        self.assertEqual(result["frame_thumbnails"][flagged["index"]], os.path.join(tmpdir, "frame_01.jpg"))
+        self.assertEqual(markers[flagged["marker_index"]]["heatmap_path"], flagged["heatmap_path"])
+        self.assertIsNotNone(flagged["heatmap_path"])
+
+    @unittest.skipUnless(shutil.which("ffmpeg"), "ffmpeg not installed")
+    def test_long_gop_and_offset_clips_keep_every_sample(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for name, extra in (("gop.mp4", ["-g", "90"]), ("offset.mp4", ["-g", "30", "-output_ts_offset", "5"])):
+                path = os.path.join(tmpdir, name)
+                subprocess.run(
+                    ["ffmpeg", "-v", "error", "-y", "-f", "lavfi", "-i", "testsrc=size=160x120:rate=30",
+                     "-t", "10", "-c:v", "mpeg4", *extra, path],
+                    check=True,
+                )
+
+                result = forensics.video_forensics(path, duration_s=10.0, output_dir=os.path.join(tmpdir, name + "_out"))
+
+                times = [m["time_s"] for m in result["timeline_markers"] if m["status"] == "OK"]
+                self.assertEqual(len(times), 12, name)
+                self.assertEqual(len(set(times)), 12, name)
+                # relative to the stream start, like -ss seeking
+                self.assertTrue(all(0 < t < 10 for t in times), (name, times))
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,102 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from backend import report
+
+
+def _case_result(case_id, title, evidence):
+    return {
+        "case_id": case_id,
+        "filename": title,
+        "media_type": "case",
+        "sha256": "",
+        "bytes": "",
+        "provenance_state": "OPEN",
+        "metadata": {},
+        "c2pa": {},
+        "derived_timeline": {},
+        "metadata_consistency": {},
+        "evidence": evidence,
+    }
+
+
+class ReportIdTests(unittest.TestCase):
+    def test_case_reports_in_the_same_minute_get_distinct_ids(self):
+        at = "2024-05-01 10:20 UTC"
+        a = _case_result("case-a", "Case", [{"id": "e1", "sha256": "aa"}])
+        b = _case_result("case-b", "Case", [{"id": "e2", "sha256": "bb"}])
+
+        id_a = report._hash_result_for_id(a, at)
+        self.assertNotEqual(id_a[:12], report._hash_result_for_id(b, at)[:12])
+        self.assertEqual(id_a, report._hash_result_for_id(dict(a), at))
+
+    def test_report_id_covers_findings(self):
+        at = "2024-05-01 10:20 UTC"
+        base = {"sha256": "ab" * 32, "tools": {}, "provenance_state": "UNVERIFIABLE_NO_PROVENANCE"}
+        altered = dict(base, provenance_state="ALTERED_OR_BROKEN_PROVENANCE")
+        self.assertNotEqual(report._hash_result_for_id(base, at), report._hash_result_for_id(altered, at))
+
+    def test_surrogates_hash_like_their_replacement(self):
+        # one canonical encoding: inputs orjson rejects are normalised, not re-encoded differently
+        at = "2024-05-01 10:20 UTC"
+        bad = {"sha256": "x", "metadata": {"EXIF:Make": "Ac\udcffme"}}
+        replaced = {"sha256": "x", "metadata": {"EXIF:Make": "Ac?me"}}
+        self.assertEqual(report._hash_result_for_id(bad, at), report._hash_result_for_id(replaced, at))
+
+
+class IntegrityBlockTests(unittest.TestCase):
+    def test_long_values_are_clipped_and_the_block_splits_across_pages(self):
+        from reportlab.pdfbase.pdfmetrics import stringWidth
+        from reportlab.pdfgen.canvas import Canvas
+
+        block_cls = report._integrity_block_cls()
+        tools = {f"tool{i:02d}": {"version": f"{i}." + "9" * 300} for i in range(60)}
+        result = {
+            "filename": "clip.mp4",
+            "media_type": "video",
+            "sha256": "ab" * 200,
+            "tools": tools,
+            "analyzed_at": "2024-05-01 10:20 UTC",
+        }
+
+        drawn_parts, strings = [], []
+        real_draw, real_draw_string = block_cls.draw, Canvas.drawString
+
+        def draw(block):
+            drawn_parts.append((block.first_row, list(block.rows)))
+            with mock.patch.object(Canvas, "drawString", draw_string):
+                real_draw(block)
+
+        def draw_string(canvas, x, y, text, *args, **kwargs):
+            strings.append((x, text))
+            return real_draw_string(canvas, x, y, text, *args, **kwargs)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            out = os.path.join(tmpdir, "report.pdf")
+            with mock.patch.object(block_cls, "draw", draw):
+                report.build_pdf_report(result, out)
+            with open(out, "rb") as f:
+                self.assertTrue(f.read(5).startswith(b"%PDF"))
+
+        # 62 rows don't fit on one page: every row is drawn once, in order, over several parts
+        self.assertGreater(len(drawn_parts), 1)
+        rows = [row for _, part in drawn_parts for row in part]
+        self.assertEqual(len(rows), 62)
+        self.assertEqual([row[1] for row in rows[2:]], report._tool_version_lines(tools))
+        self.assertEqual(drawn_parts[1][0], len(drawn_parts[0][1]))  # striping continues
+
+        # the 64-hex report hash fits its column; over-long tool versions are clipped with an ellipsis
+        probe = block_cls([])
+        value_w = probe.width - probe.key_w - 12
+        values = [text for x, text in strings if x == probe.key_w + 6]
+        self.assertEqual(len(values), 62)
+        self.assertEqual(len(values[0]), 64)
+        for text in values[2:]:
+            self.assertTrue(text.endswith("…"), text[:40])
+            self.assertLessEqual(stringWidth(text, *probe.font), value_w)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,13 +1,25 @@
+import functools
 import hashlib
+import mmap
+import os
 import subprocess
 from typing import Tuple
 
+def sha256_file_and_size(path: str) -> Tuple[str, int]:
+    """Hex SHA-256 and byte size of a file, from a single open + fstat."""
+    with open(path, "rb", buffering=0) as f:
+        size = os.fstat(f.fileno()).st_size
+        if hasattr(hashlib, "file_digest"):
+            # 3.11+: the read/update loop runs in C (OpenSSL uses SHA-NI where available)
+            return hashlib.file_digest(f, "sha256").hexdigest(), size
+        h = hashlib.sha256()
+        if size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                h.update(m)
+        return h.hexdigest(), size
+
 def sha256_file(path: str) -> str:
-    h = hashlib.sha256()
-    with open(path, "rb") as f:
-        for chunk in iter(lambda: f.read(1024 * 1024), b""):
-            h.update(chunk)
-    return h.hexdigest()
+    return sha256_file_and_size(path)[0]
 
 def run_cmd(cmd: list[str], timeout: int = 30) -> Tuple[int, str, str]:
     try:
@@ -22,6 +34,22 @@ def run_cmd(cmd: list[str], timeout: int = 30) -> Tuple[int, str, str]:
     except OSError as e:
         return 125, "", f"OSERROR: {type(e).__name__}: {e}"
 
+def run_cmd_bytes(cmd: list[str], timeout: int = 30) -> Tuple[int, bytes, str]:
+    """Like run_cmd, but keeps stdout as raw bytes (for piped binary output)."""
+    try:
+        p = subprocess.run(cmd, capture_output=True, timeout=timeout)
+        return p.returncode, p.stdout, p.stderr.decode("utf-8", errors="replace").strip()
+    except FileNotFoundError:
+        return 127, b"", f"NOT_FOUND: {cmd[0]}"
+    except PermissionError:
+        return 126, b"", f"PERMISSION_DENIED: {cmd[0]}"
+    except subprocess.TimeoutExpired:
+        return 124, b"", "TIMEOUT"
+    except OSError as e:
+        return 125, b"", f"OSERROR: {type(e).__name__}: {e}"
+
+# Tool availability doesn't change within a process; avoid spawning a shell per lookup.
+@functools.lru_cache(maxsize=8)
 def which(name: str) -> bool:
     code, out, _ = run_cmd(["/usr/bin/env", "bash", "-lc", f"command -v {name}"], timeout=10)
     return code == 0 and out != ""
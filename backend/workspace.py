@@ -11,7 +11,7 @@ DEFAULT_DB_PATH = os.getenv("TRUTHSIG_DB_PATH", "/tmp/truthsig.db")
 
 
 def _utc_now_iso() -> str:
-    return datetime.datetime.utcnow().replace(microsecond=0).isoformat() + "Z"
+    return datetime.datetime.now(datetime.timezone.utc).replace(microsecond=0, tzinfo=None).isoformat() + "Z"
 
 
 def get_db_path() -> str: